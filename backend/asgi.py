@@ -0,0 +1,15 @@
+"""
+ASGI config for hr_project project.
+
+Serve with an ASGI server, e.g. `uvicorn backend.asgi:application --workers 4`;
+the async read endpoints under /api/v1/async/ then no longer hold a worker
+while they wait on the database.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+application = get_asgi_application()
@@ -0,0 +1,126 @@
+# backend/health.py
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger(__name__)
+
+
+def check_database():
+    connection = connections["default"]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        # Runs in a pool thread, which owns its own connection
+        connection.close()
+
+
+def check_smtp():
+    if settings.EMAIL_BACKEND != "django.core.mail.backends.smtp.EmailBackend":
+        return
+    timeout = settings.HEALTH_CHECK_TIMEOUTS["smtp"]
+    with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=timeout) as server:
+        server.noop()
+
+
+def check_storage():
+    default_storage.exists("healthz")
+
+
+# name -> (check, critical). Mail goes through the outbox, so an unreachable
+# SMTP server degrades the service but does not make it unready.
+CHECKS = {
+    "database": (check_database, True),
+    "storage": (check_storage, True),
+    "smtp": (check_smtp, False),
+}
+
+_executor = ThreadPoolExecutor(max_workers=len(CHECKS) * 2, thread_name_prefix="health")
+_lock = threading.Lock()
+_cached = None  # (monotonic time, results)
+
+
+def run_checks():
+    """
+    Run every check in parallel, each bounded by its own entry in
+    HEALTH_CHECK_TIMEOUTS (counted from the common start); a check that has
+    not finished by its deadline is reported as a timeout.
+    """
+    started = time.perf_counter()
+    futures = {name: _executor.submit(_timed, check) for name, (check, _) in CHECKS.items()}
+
+    results = {}
+    for name, future in futures.items():
+        remaining = started + settings.HEALTH_CHECK_TIMEOUTS[name] - time.perf_counter()
+        try:
+            ok, elapsed, error = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            logger.warning(f"Health check {name} timed out")
+            results[name] = {"ok": False, "error": "timeout"}
+            continue
+        results[name] = {"ok": ok, "ms": round(elapsed * 1000, 1)}
+        if error:
+            # The endpoints are public: only the exception type leaves the process
+            logger.warning(f"Health check {name} failed: {error}")
+            results[name]["error"] = type(error).__name__
+    return results, round((time.perf_counter() - started) * 1000, 1)
+
+
+def _timed(check):
+    started = time.perf_counter()
+    try:
+        check()
+    except Exception as e:
+        return False, time.perf_counter() - started, e
+    return True, time.perf_counter() - started, None
+
+
+def get_results():
+    """
+    Check results, reused for HEALTH_CHECK_CACHE_SECONDS. The lock makes
+    concurrent probes wait for one run instead of each hitting every
+    dependency.
+    """
+    global _cached
+    with _lock:
+        now = time.monotonic()
+        if _cached is None or now - _cached[0] >= settings.HEALTH_CHECK_CACHE_SECONDS:
+            results, elapsed = run_checks()
+            _cached = (time.monotonic(), {"checks": results, "ms": elapsed})
+        return _cached[1]
+
+
+def _report(ready_only):
+    results = get_results()
+    checks = results["checks"]
+    healthy = all(check["ok"] for check in checks.values())
+    ready = all(checks[name]["ok"] for name, (_, critical) in CHECKS.items() if critical)
+    body = {
+        "status": "ok" if healthy else ("degraded" if ready else "unavailable"),
+        "checks": checks,
+        "ms": results["ms"],
+    }
+    status = 200 if (ready or not ready_only) else 503
+    return JsonResponse(body, status=status, headers={"Cache-Control": "no-store"})
+
+
+@require_GET
+def healthz(request):
+    """Liveness: reports every dependency but stays 200 while the process serves requests."""
+    return _report(ready_only=False)
+
+
+@require_GET
+def readyz(request):
+    """Readiness: 503 unless the database and storage checks pass."""
+    return _report(ready_only=True)
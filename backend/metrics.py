@@ -0,0 +1,101 @@
+# backend/metrics.py
+import hmac
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .middleware import view_stats
+
+# psycopg_pool counter -> (metric name, help). Counters are cumulative per process.
+POOL_COUNTERS = {
+    "requests_num": ("db_pool_requests_total", "Connections requested from the pool."),
+    "requests_queued": ("db_pool_requests_queued_total", "Requests that had to wait for a connection."),
+    "requests_wait_ms": ("db_pool_requests_wait_ms_total", "Time spent waiting for a connection."),
+    "requests_errors": ("db_pool_requests_errors_total", "Requests that timed out or failed."),
+    "connections_num": ("db_pool_connections_total", "Connections opened by the pool."),
+    "connections_ms": ("db_pool_connections_ms_total", "Time spent opening connections."),
+    "connections_lost": ("db_pool_connections_lost_total", "Connections found broken by the health check."),
+    "returns_bad": ("db_pool_returns_bad_total", "Connections returned in a bad state."),
+}
+
+# Per-view request timing total -> (metric name, help), over sampled requests only
+VIEW_COUNTERS = {
+    "requests": ("http_view_sampled_requests_total", "Sampled requests."),
+    "total_ms": ("http_view_duration_ms_total", "Time spent serving sampled requests."),
+    "view_ms": ("http_view_view_ms_total", "Time spent before rendering the response."),
+    "serialize_ms": ("http_view_serialize_ms_total", "Time spent rendering the response."),
+    "db_ms": ("http_view_db_ms_total", "Time spent in database queries."),
+    "queries": ("http_view_queries_total", "Database queries run."),
+}
+
+
+def db_pool_stats():
+    """
+    {alias: stats} for every pooled database of this process, with the
+    utilisation (share of the pool in use) and mean wait per request added.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        pool_stats = pool.get_stats()
+        size = pool_stats.get("pool_size", 0)
+        in_use = size - pool_stats.get("pool_available", 0)
+        requests = pool_stats.get("requests_num", 0)
+        stats[alias] = {
+            **pool_stats,
+            "in_use": in_use,
+            "utilization": in_use / pool_stats["pool_max"] if pool_stats.get("pool_max") else 0.0,
+            "mean_wait_ms": pool_stats.get("requests_wait_ms", 0) / requests if requests else 0.0,
+        }
+    return stats
+
+
+def _gauge(lines, name, help_text, values):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} gauge")
+    lines.extend(f'{name}{{database="{alias}"}} {value}' for alias, value in values)
+
+
+def metrics_allowed(request):
+    """True for the METRICS_TOKEN bearer token or a client address in METRICS_ALLOWED_IPS."""
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return True
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+@require_GET
+def metrics(request):
+    """Connection pool and per-view timing metrics in the Prometheus text format, per worker process."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    stats = db_pool_stats()
+    lines = []
+    for key, name, help_text in (
+        ("pool_size", "db_pool_size", "Connections currently open."),
+        ("pool_max", "db_pool_max_size", "Configured maximum pool size."),
+        ("in_use", "db_pool_in_use", "Connections handed out to requests."),
+        ("utilization", "db_pool_utilization", "Share of the maximum pool size in use."),
+        ("requests_waiting", "db_pool_requests_waiting", "Requests waiting for a connection now."),
+        ("mean_wait_ms", "db_pool_mean_wait_ms", "Mean wait for a connection."),
+    ):
+        _gauge(lines, name, help_text, [(alias, values.get(key, 0)) for alias, values in stats.items()])
+    for key, (name, help_text) in POOL_COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f'{name}{{database="{alias}"}} {values.get(key, 0)}' for alias, values in stats.items())
+    views = view_stats()
+    for key, (name, help_text) in VIEW_COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f'{name}{{view="{view}"}} {round(totals[key], 3)}' for view, totals in views.items())
+    return HttpResponse(
+        "\n".join(lines) + "\n",
+        content_type="text/plain; version=0.0.4",
+        headers={"Cache-Control": "no-store"},
+    )
@@ -0,0 +1,177 @@
+# backend/middleware.py
+import json
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# The timings of the sampled request being served; worker threads started
+# with sync_to_async see the same object through their copy of the context
+_current = ContextVar("request_timings", default=None)
+
+_views_lock = threading.Lock()
+_views = {}  # view name -> totals of its sampled requests
+VIEW_TOTALS = ("requests", "total_ms", "view_ms", "serialize_ms", "db_ms", "queries")
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serialize_start = None
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper counting the queries and database time of a sampled request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    # connection_created fires again on every reconnect of the same wrapper
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def view_stats():
+    """{view name: totals} over the sampled requests of this process."""
+    with _views_lock:
+        return {view: dict(totals) for view, totals in _views.items()}
+
+
+class RequestTimingMiddleware:
+    """
+    For a REQUEST_TIMING_SAMPLE_RATE share of requests, measure the queries
+    and database time (an execute wrapper on every connection, so it works
+    without DEBUG and for queries run in worker threads), the time spent
+    rendering the response and the total. The numbers are logged as one
+    JSON line, added to per-view totals served at /metrics and, where
+    REQUEST_TIMING_HEADER allows, sent as a Server-Timing header. A request running more than
+    REQUEST_TIMING_QUERY_WARNING queries is logged as a warning: that is
+    how an N+1 in a nested serializer shows up.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_timer, dispatch_uid="request_timing")
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        token = _current.set(RequestTimings())
+        try:
+            response = self.get_response(request)
+            return self.finish(request, response, _current.get(), self.show_header(request))
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        token = _current.set(RequestTimings())
+        try:
+            response = await self.get_response(request)
+            # The session user is loaded lazily, with a synchronous query
+            show_header = await sync_to_async(self.show_header)(request)
+            return self.finish(request, response, _current.get(), show_header)
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    def sampled():
+        rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    @staticmethod
+    def show_header(request):
+        mode = settings.REQUEST_TIMING_HEADER
+        if mode == "staff":
+            # DRF puts the user it authenticated (e.g. from a JWT) on the request
+            user = getattr(request, "user", None)
+            return bool(user is not None and user.is_staff)
+        return mode == "all"
+
+    def process_template_response(self, request, response):
+        # Runs just before DRF renders the data; the callback right after
+        timings = _current.get()
+        if timings is not None:
+            timings.serialize_start = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(timings))
+        return response
+
+    @staticmethod
+    def rendered(timings):
+        timings.serialize += time.perf_counter() - timings.serialize_start
+        timings.serialize_start = None
+
+    def finish(self, request, response, timings, show_header):
+        total = (time.perf_counter() - timings.start) * 1000
+        db = timings.db * 1000
+        serialize = timings.serialize * 1000
+        view = total - serialize
+        if show_header:
+            response["Server-Timing"] = ", ".join(
+                (
+                    f'db;dur={db:.1f};desc="{timings.queries} queries"',
+                    f"view;dur={view:.1f}",
+                    f"serialize;dur={serialize:.1f}",
+                    f"total;dur={total:.1f}",
+                )
+            )
+
+        match = request.resolver_match
+        view_name = match.view_name if match else "unresolved"
+        with _views_lock:
+            totals = _views.setdefault(view_name, dict.fromkeys(VIEW_TOTALS, 0))
+            totals["requests"] += 1
+            totals["total_ms"] += total
+            totals["view_ms"] += view
+            totals["serialize_ms"] += serialize
+            totals["db_ms"] += db
+            totals["queries"] += timings.queries
+
+        level = logging.WARNING if timings.queries > settings.REQUEST_TIMING_QUERY_WARNING else logging.INFO
+        logger.log(
+            level,
+            json.dumps(
+                {
+                    "event": "request_timing",
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view_name,
+                    "status": response.status_code,
+                    "queries": timings.queries,
+                    "db_ms": round(db, 2),
+                    "view_ms": round(view, 2),
+                    "serialize_ms": round(serialize, 2),
+                    "total_ms": round(total, 2),
+                }
+            ),
+        )
+        return response
@@ -0,0 +1,162 @@
+# backend/router.py
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+# Replica chosen for the replica-safe view action being served (see
+# ReplicaReadMixin); None reads from the primary
+_replica_alias = ContextVar("replica_alias", default=None)
+_down_until = {}  # replica alias -> monotonic time until which it is skipped
+
+STICKY_COOKIE = "db_primary_until"
+STICKY_HEADER = "X-DB-Primary-Until"
+
+
+def replica_aliases():
+    return list(settings.DATABASE_REPLICA_WEIGHTS)
+
+
+def current_replica():
+    """Alias of the replica serving this request's reads, None for the primary."""
+    return _replica_alias.get()
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, e.g. to fill a shared cache."""
+    token = _replica_alias.set(None)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+def choose_replica():
+    """
+    Weighted random pick among the replicas that are not marked down, trying
+    the others when the pick cannot connect. None means: use the primary.
+    """
+    now = time.monotonic()
+    candidates = {
+        alias: weight
+        for alias, weight in settings.DATABASE_REPLICA_WEIGHTS.items()
+        if _down_until.get(alias, 0) <= now and weight > 0
+    }
+    while candidates:
+        alias = random.choices(list(candidates), weights=list(candidates.values()))[0]
+        try:
+            # Connects now rather than at the first query, so a dead replica
+            # is noticed here where the primary can still take over
+            connections[alias].ensure_connection()
+            return alias
+        except OperationalError as e:
+            logger.warning(f"Read replica {alias} unavailable, skipping it: {e}")
+            _down_until[alias] = now + settings.DATABASE_REPLICA_RETRY_SECONDS
+            del candidates[alias]
+    return None
+
+
+class ReplicaRouter:
+    """
+    Writes, and every read outside a replica-safe view action, go to the
+    primary: authentication, permission checks and anything inside a write
+    request. Reads inside a replica-safe action (see ReplicaReadMixin) all
+    go to the one replica chosen for that request, so its validators,
+    counts, rows and payloads see the same replication position.
+    """
+
+    def db_for_read(self, model, **hints):
+        # The database cache holds the shared invalidation versions, which
+        # must never be read behind the primary
+        if model._meta.app_label == "django_cache":
+            return DEFAULT_DB_ALIAS
+        return _replica_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def is_sticky(request):
+    """True during the read-your-writes window after this client's last write."""
+    value = request.COOKIES.get(STICKY_COOKIE) or request.headers.get(STICKY_HEADER)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+class ReplicaReadMixin:
+    """
+    For DRF viewsets: run the actions in `replica_read_actions` against a
+    read replica, picked once per request (weighted, skipping replicas that
+    are down; the primary when none can be reached). Authentication and
+    permission checks in initial() still use the primary; clients inside
+    their read-your-writes window (ReadYourWritesMiddleware) keep reading
+    from the primary too.
+    """
+
+    replica_read_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.DATABASE_REPLICA_WEIGHTS
+            and request.method in ("GET", "HEAD")
+            and self.action in self.replica_read_actions
+            and not is_sticky(request)
+        ):
+            # Not a reset token: the async views run initial() in a worker
+            # thread's copy of the context
+            self._replica_previous = _replica_alias.get()
+            _replica_alias.set(choose_replica())
+
+    def _leave_replica(self):
+        if hasattr(self, "_replica_previous"):
+            _replica_alias.set(self._replica_previous)
+            del self._replica_previous
+
+    # handle_exception runs first when the handler fails, and re-raises
+    # errors that are not API errors without reaching finalize_response
+    def handle_exception(self, exc):
+        self._leave_replica()
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self._leave_replica()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReadYourWritesMiddleware(MiddlewareMixin):
+    """
+    After a successful write, send the client a cookie (and header) that
+    keeps its reads on the primary for DATABASE_REPLICA_STICKY_SECONDS,
+    longer than replication lag, so authors immediately see their edits.
+    Non-browser clients can echo the header back instead of the cookie.
+    """
+
+    def process_response(self, request, response):
+        if (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+            and settings.DATABASE_REPLICA_WEIGHTS
+        ):
+            window = settings.DATABASE_REPLICA_STICKY_SECONDS
+            until = f"{time.time() + window:.3f}"
+            response.set_cookie(STICKY_COOKIE, until, max_age=window, httponly=True, samesite="Lax")
+            response[STICKY_HEADER] = until
+        return response
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_filters",
     "rest_framework",
     "corsheaders",
@@ -42,12 +43,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers the other middleware
+    "backend.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "backend.router.ReadYourWritesMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -70,7 +74,42 @@ TEMPLATES = [
     },
 ]
 
+# Request timing (backend/middleware.py): share of requests whose queries,
+# database and rendering time are measured, logged as JSON and totalled per
+# view at /metrics. Sampled requests with more queries than
+# REQUEST_TIMING_QUERY_WARNING are logged as warnings. The numbers describe
+# the backend, so the Server-Timing header carrying them is only sent as
+# REQUEST_TIMING_HEADER allows: "staff" (to staff users), "all" or "off".
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get("REQUEST_TIMING_SAMPLE_RATE", 0.1))
+REQUEST_TIMING_QUERY_WARNING = int(os.environ.get("REQUEST_TIMING_QUERY_WARNING", 30))
+REQUEST_TIMING_HEADER = os.environ.get("REQUEST_TIMING_HEADER", "staff")
+
+# /metrics is only served to clients sending "Authorization: Bearer
+# <METRICS_TOKEN>" (when set) or connecting from METRICS_ALLOWED_IPS
+# (REMOTE_ADDR, so the scraper must not come through a shared proxy)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()
+]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "backend.middleware": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
+
+# Connection reuse: with DATABASE_POOL=True each process keeps a psycopg 3
+# pool (sizes and lifetimes below, metrics at /metrics); otherwise a
+# connection is kept for DATABASE_CONN_MAX_AGE seconds (WSGI only: under ASGI
+# every request runs in a new thread, so use the pool there). Either way a
+# reused connection is health-checked first.
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "False") == "True"
 
 DATABASES = {
     "default": {
@@ -80,9 +119,50 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("DATABASE_HOST"),
         "PORT": os.environ.get("DATABASE_PORT"),
+        # The pool manages connection lifetime itself
+        "CONN_MAX_AGE": 0 if DATABASE_POOL else int(os.environ.get("DATABASE_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": {
+                "min_size": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+                # Seconds a request waits for a free connection before failing
+                "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+                "max_idle": float(os.environ.get("DATABASE_POOL_MAX_IDLE", 300)),
+                "max_lifetime": float(os.environ.get("DATABASE_POOL_MAX_LIFETIME", 1800)),
+            }
+        }
+        if DATABASE_POOL
+        else {},
     }
 }
 
+# Read replicas: DATABASE_REPLICAS="host[:port][/name][@weight],...", e.g.
+# "10.0.0.2:5432@3,10.0.0.3@1". Each replica gets the primary's credentials
+# and connection settings as alias replica1, replica2, ... Replica-safe reads
+# (backend/router.py) are spread over them by weight; a replica that cannot
+# be reached is skipped for DATABASE_REPLICA_RETRY_SECONDS. After a write a
+# client keeps reading from the primary for DATABASE_REPLICA_STICKY_SECONDS,
+# which must exceed the replication lag. Leave DATABASE_REPLICAS unset for the
+# test suite: a TestCase's rows are not visible through another connection.
+DATABASE_REPLICA_WEIGHTS = {}
+for _index, _entry in enumerate(filter(None, os.environ.get("DATABASE_REPLICAS", "").split(",")), 1):
+    _entry, _, _weight = _entry.strip().partition("@")
+    _entry, _, _name = _entry.partition("/") if not _entry.startswith("/") else (_entry, "", "")
+    _host, _, _port = _entry.rpartition(":") if ":" in _entry else (_entry, "", "")
+    DATABASES[f"replica{_index}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "NAME": _name or DATABASES["default"]["NAME"],
+        # Tests read the test database through every replica alias
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICA_WEIGHTS[f"replica{_index}"] = int(_weight or 1)
+DATABASE_REPLICA_RETRY_SECONDS = int(os.environ.get("DATABASE_REPLICA_RETRY_SECONDS", 30))
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", 10))
+DATABASE_ROUTERS = ["backend.router.ReplicaRouter"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -109,9 +189,33 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "users.CustomUser"
 
+# Login pipeline (users/login.py): password hashing runs on a pool of
+# LOGIN_HASH_WORKERS threads (0 = one per core) with at most LOGIN_HASH_QUEUE
+# logins waiting; last_login is written in batches every LAST_LOGIN_FLUSH_SECONDS
+# (0 = at once)
+AUTHENTICATION_BACKENDS = ["users.login.PooledModelBackend"]
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", 0))
+LOGIN_HASH_QUEUE = int(os.environ.get("LOGIN_HASH_QUEUE", 64))
+LOGIN_HASH_QUEUE_TIMEOUT = float(os.environ.get("LOGIN_HASH_QUEUE_TIMEOUT", 5))
+LAST_LOGIN_FLUSH_SECONDS = float(os.environ.get("LAST_LOGIN_FLUSH_SECONDS", 5))
+
+# Refresh token blacklist (users/blacklist.py): the in-process Bloom filter is
+# sized for this many live revocations and re-synced from the table this often
+REVOKED_TOKEN_BLOOM_CAPACITY = int(os.environ.get("REVOKED_TOKEN_BLOOM_CAPACITY", 200000))
+REVOKED_TOKEN_BLOOM_ERROR_RATE = float(os.environ.get("REVOKED_TOKEN_BLOOM_ERROR_RATE", 0.01))
+REVOKED_TOKEN_SYNC_SECONDS = float(os.environ.get("REVOKED_TOKEN_SYNC_SECONDS", 1))
+
+# Opt-in: access tokens carry role/permission claims and API requests are
+# authorised from them without loading the user (users/authentication.py)
+JWT_STATELESS_AUTH = os.environ.get("JWT_STATELESS_AUTH", "False") == "True"
+# Claims older than this are re-checked against the database
+JWT_CLAIMS_MAX_AGE_SECONDS = int(os.environ.get("JWT_CLAIMS_MAX_AGE_SECONDS", 300))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication"
+        if JWT_STATELESS_AUTH
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
@@ -126,6 +230,41 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
 
+# Cache
+# "default" holds cached data and may be per process (locmem). The versions
+# that invalidate it (backend/versions.py) live in "shared", which every
+# worker on every node must see: the database by default (created by
+# migrate), or e.g. Redis via SHARED_CACHE_BACKEND/SHARED_CACHE_LOCATION.
+# Workers re-read a version at most every SHARED_VERSION_POLL_SECONDS.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "assessments"),
+    },
+    "shared": {
+        "BACKEND": os.environ.get(
+            "SHARED_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.environ.get("SHARED_CACHE_LOCATION", "shared_cache"),
+    },
+}
+SHARED_VERSION_POLL_SECONDS = float(os.environ.get("SHARED_VERSION_POLL_SECONDS", 1))
+TAXONOMY_CACHE_TIMEOUT = int(os.environ.get("TAXONOMY_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# pg_trgm similarity (0..1) required for Domain/Topic fuzzy search matches
+TRIGRAM_SIMILARITY_THRESHOLD = float(os.environ.get("TRIGRAM_SIMILARITY_THRESHOLD", 0.3))
+
+# Question list rendering: "serializer" (DRF) or "postgres" (JSON built in the DB)
+QUESTION_LIST_ENGINE = os.environ.get("QUESTION_LIST_ENGINE", "serializer")
+
+# Per-process question index used by paper generation is rebuilt after this many seconds
+QUESTION_INDEX_TTL_SECONDS = int(os.environ.get("QUESTION_INDEX_TTL_SECONDS", 300))
+
+# Compiled answer keys kept per process (LRU) for grading
+ANSWER_KEY_CACHE_SIZE = int(os.environ.get("ANSWER_KEY_CACHE_SIZE", 20000))
+
 # Email
 # Configuration for a local email testing tool like Mailpit.
 # This will catch all outgoing emails and display them in a web UI.
@@ -135,6 +274,27 @@ EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 1025))
 EMAIL_USE_TLS = False
 DEFAULT_FROM_EMAIL = "noreply@hrapp.com"
 
+# Outbox delivery (manage.py send_outbox): retries back off exponentially from
+# EMAIL_OUTBOX_BACKOFF_SECONDS until EMAIL_OUTBOX_MAX_ATTEMPTS marks a row failed
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get("EMAIL_OUTBOX_BACKOFF_SECONDS", 30))
+EMAIL_TIMEOUT = int(os.environ.get("EMAIL_TIMEOUT", 10))
+
+# /healthz and /readyz: timeout of each dependency check (seconds) and how
+# long results are reused
+HEALTH_CHECK_TIMEOUTS = {
+    "database": float(os.environ.get("HEALTH_CHECK_DATABASE_TIMEOUT", 1)),
+    "storage": float(os.environ.get("HEALTH_CHECK_STORAGE_TIMEOUT", 2)),
+    "smtp": float(os.environ.get("HEALTH_CHECK_SMTP_TIMEOUT", 3)),
+}
+HEALTH_CHECK_CACHE_SECONDS = float(os.environ.get("HEALTH_CHECK_CACHE_SECONDS", 5))
+
+# Bulk onboarding: PBKDF2 rounds of the random temporary passwords (upgraded
+# to the full count at first login) and rows per request
+ONBOARDING_PASSWORD_ITERATIONS = int(os.environ.get("ONBOARDING_PASSWORD_ITERATIONS", 1000))
+ONBOARDING_MAX_ROWS = int(os.environ.get("ONBOARDING_MAX_ROWS", 10000))
+
 # settings.py
 # The base URL of your frontend application (e.g., React, Vue, Angular)
 CLIENT_URL = os.environ.get("CLIENT_URL", "localhost")
@@ -152,7 +312,9 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
     "ngrok-skip-browser-warning",  # Allow this specific header
+    "x-db-primary-until",  # Read-your-writes window for clients without cookies
 ]
+CORS_EXPOSE_HEADERS = ["x-db-primary-until", "server-timing"]
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Assessments Backend",
@@ -174,5 +336,6 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # Written behind in batches by users.login.last_logins instead
+    "UPDATE_LAST_LOGIN": False,
 }
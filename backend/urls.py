@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
-from users.views import CustomTokenObtainPairView
+from users.views import (
+    CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    CustomTokenVerifyView,
+)
+from .health import healthz, readyz
+from .metrics import metrics
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -10,12 +15,18 @@ from drf_spectacular.views import (
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Health checks (load balancer / orchestrator probes)
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
+    path("metrics", metrics, name="metrics"),
     path("api/v1/users/", include("users.urls")),
     path("api/v1/questions/", include("questions.urls")),
+    # Async variants of the question read endpoints (ASGI, backend/asgi.py)
+    path("api/v1/async/", include("questions.async_urls")),
     # JWT Authentication
     path("api/token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    path("api/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path("api/token/refresh/", CustomTokenRefreshView.as_view(), name="token_refresh"),
+    path("api/token/verify/", CustomTokenVerifyView.as_view(), name="token_verify"),
     # SCHEMA, DRF-SPECTACULAR
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     # Optional UI:
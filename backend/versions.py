@@ -0,0 +1,74 @@
+# backend/versions.py
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_seen = {}  # name -> (version, monotonic time it was read from the shared cache)
+
+
+def _key(name):
+    return f"versions:{name}"
+
+
+def get_version(name):
+    """
+    Current version of `name` as shared by every worker process (the
+    "shared" cache, the database by default). Each process re-reads it at
+    most every SHARED_VERSION_POLL_SECONDS, so a bump made elsewhere is seen
+    within that window without a query per lookup.
+    """
+    version = _recently_seen(name)
+    if version is None:
+        now = time.monotonic()
+        shared = caches["shared"]
+        version = shared.get(_key(name))
+        if version is None:
+            shared.add(_key(name), uuid.uuid4().hex, timeout=None)
+            version = shared.get(_key(name))
+        _seen[name] = (version, now)
+    return version
+
+
+async def aget_version(name):
+    """
+    get_version() for async views: the shared cache may be the database,
+    which the event loop must not query directly.
+    """
+    version = _recently_seen(name)
+    if version is None:
+        now = time.monotonic()
+        shared = caches["shared"]
+        version = await shared.aget(_key(name))
+        if version is None:
+            await shared.aadd(_key(name), uuid.uuid4().hex, timeout=None)
+            version = await shared.aget(_key(name))
+        _seen[name] = (version, now)
+    return version
+
+
+def _recently_seen(name):
+    seen = _seen.get(name)
+    if seen is not None and time.monotonic() - seen[1] < settings.SHARED_VERSION_POLL_SECONDS:
+        return seen[0]
+    return None
+
+
+def _set_version(name):
+    # A fresh random value rather than an increment: a bump rolled back with
+    # its transaction can never be reused by a later one
+    version = uuid.uuid4().hex
+    caches["shared"].set(_key(name), version, timeout=None)
+    _seen[name] = (version, time.monotonic())
+
+
+def bump_version(name):
+    """
+    Give `name` a new version now and again once the current transaction
+    commits: a reader that loaded the old rows in between cached them under
+    the intermediate version, which the second bump makes unreachable.
+    """
+    _set_version(name)
+    transaction.on_commit(lambda: _set_version(name))
@@ -0,0 +1,133 @@
+# questions/answer_keys.py
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from backend.versions import bump_version, get_version
+
+from .models import Question
+from .payloads import attach_payloads
+
+# Compact, immutable answer keys; case/diagram questions compile to None
+MCQKey = namedtuple("MCQKey", ["options", "correct"])  # sorted option ids, frozenset of correct ids
+NumericalKey = namedtuple("NumericalKey", ["answer", "tolerance", "unit"])
+CachedKey = namedtuple("CachedKey", ["type", "key"])
+
+
+def compile_key(question):
+    """Compile the answer key of a question whose payload cache is filled (see attach_payloads)."""
+    if question.type == "mcq":
+        payload = getattr(question, "mcq_payload", None)
+        if payload is not None:
+            return MCQKey(tuple(sorted(payload.options)), frozenset(payload.correct))
+    elif question.type == "num":
+        payload = getattr(question, "num_payload", None)
+        if payload is not None:
+            return NumericalKey(payload.answer, payload.tolerance, payload.unit)
+    return None
+
+
+class AnswerKeyCache:
+    """
+    Per-process LRU of compiled answer keys by question id.
+
+    Entries remember the question type they were compiled for, so a key is
+    only served while the question still has that type. Payload writes and
+    deletes (signals, see QuestionsConfig.ready) and type changes
+    (QuestionSerializer.update) bump the shared "answer_keys" version; every
+    process empties its LRU once it sees a new version, within
+    SHARED_VERSION_POLL_SECONDS. Rows loaded while the version changed are
+    served but not cached, so a reader racing a writer cannot put the old
+    key back.
+    """
+
+    def __init__(self, maxsize=None):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def maxsize(self):
+        return settings.ANSWER_KEY_CACHE_SIZE if self._maxsize is None else self._maxsize
+
+    def get_many(self, types):
+        """
+        Compiled keys for {question id: current type}. Missing or stale
+        entries are loaded together with one query per payload table.
+        """
+        found, missing = {}, []
+        version = get_version("answer_keys")
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            for question_id, qtype in types.items():
+                entry = self._entries.get(question_id)
+                if entry is not None and entry.type == qtype:
+                    self._entries.move_to_end(question_id)
+                    found[question_id] = entry.key
+                    self.hits += 1
+                else:
+                    missing.append(question_id)
+                    self.misses += 1
+
+        if missing:
+            questions = list(Question.objects.only("id", "type").filter(id__in=missing))
+            attach_payloads(questions)
+            keep = get_version("answer_keys") == version
+            with self._lock:
+                keep = keep and self._version == version
+                for question in questions:
+                    key = compile_key(question)
+                    found[question.id] = key
+                    if keep:
+                        self._entries[question.id] = CachedKey(question.type, key)
+                        self._entries.move_to_end(question.id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return found
+
+    def invalidate(self, question_id):
+        with self._lock:
+            self._entries.pop(question_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+answer_keys = AnswerKeyCache()
+
+
+def invalidate_answer_key(question_id):
+    answer_keys.invalidate(question_id)
+    # Bumped again on commit, so other processes and readers that loaded
+    # the old row in the meantime drop their keys too
+    bump_version("answer_keys")
+
+
+def invalidate_payload_answer_key(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the payload models."""
+    invalidate_answer_key(instance.question_id)
+
+
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    """post_delete receiver for Question."""
+    invalidate_answer_key(instance.pk)
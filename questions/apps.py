@@ -1,6 +1,41 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class QuestionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'questions'
+
+    def ready(self):
+        from .answer_keys import (
+            invalidate_payload_answer_key,
+            invalidate_question_answer_key,
+        )
+        from users.models import CustomUser
+        from .cache import bump_taxonomy_version
+        from .conditional import bump_content_version
+        from .models import (
+            CasePayload,
+            DiagramPayload,
+            Domain,
+            MCQPayload,
+            NumericalPayload,
+            Question,
+            Topic,
+        )
+
+        # Any taxonomy write invalidates every cached Domain/Topic response
+        for model in (Domain, Topic):
+            post_save.connect(bump_taxonomy_version, sender=model)
+            post_delete.connect(bump_taxonomy_version, sender=model)
+
+        # Payload writes/deletes drop the compiled answer key of their question
+        for model in (MCQPayload, NumericalPayload):
+            post_save.connect(invalidate_payload_answer_key, sender=model)
+            post_delete.connect(invalidate_payload_answer_key, sender=model)
+        post_delete.connect(invalidate_question_answer_key, sender=Question)
+
+        # Payloads and author emails are part of question responses (ETags)
+        for model in (MCQPayload, NumericalPayload, CasePayload, DiagramPayload, CustomUser):
+            post_save.connect(bump_content_version, sender=model)
+            post_delete.connect(bump_content_version, sender=model)
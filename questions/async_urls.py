@@ -0,0 +1,16 @@
+# questions/async_urls.py
+from django.urls import path
+
+from . import async_views
+
+# Async read endpoints mirroring questions/urls.py, for ASGI deployments
+urlpatterns = [
+    path("questions/domains/", async_views.AsyncDomainListView.as_view(), name="async-domains-list"),
+    path("questions/topics/", async_views.AsyncTopicListView.as_view(), name="async-topics-list"),
+    path("questions/", async_views.AsyncQuestionListView.as_view(), name="async-questions-list"),
+    path(
+        "questions/<str:pk>/",
+        async_views.AsyncQuestionDetailView.as_view(),
+        name="async-questions-detail",
+    ),
+]
@@ -0,0 +1,150 @@
+# questions/async_views.py
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from backend.router import primary_reads
+
+from .cache import ataxonomy_cache_key
+from .conditional import (
+    alist_validators,
+    aobject_validators,
+    not_modified_response,
+    set_validators,
+)
+from .models import Question
+from .payloads import aattach_payloads
+from .pg_json import render_question_page
+from .views import DomainViewSet, QuestionViewSet, TopicViewSet
+
+
+class AsyncViewSetView(ABC, View):
+    """
+    Async twin of one read action of a DRF viewset, for ASGI deployments.
+
+    DRF has no async handlers, so the viewset is only borrowed: its
+    authentication, permission and filter classes run in a worker thread,
+    the rows are read with Django's async ORM and its serializer and
+    renderers produce the response. While a request waits on Postgres the
+    event loop keeps serving others instead of pinning a worker. Nothing in
+    handle() may query the database synchronously: use the async ORM, the
+    a* helpers (aget_version() and its callers) or sync_to_async.
+    """
+
+    viewset_class = None
+    action = None
+    basename = None
+
+    async def get(self, request, *args, **kwargs):
+        view = self.viewset_class(action=self.action, basename=self.basename)
+        view.action_map = {"get": self.action}
+        view.args, view.kwargs = args, kwargs
+        view.format_kwarg = None
+        view.headers = {}
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        try:
+            # Authentication may load the user; permissions may read the cache
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+            response = await self.handle(view, request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return view.finalize_response(request, response, *args, **kwargs)
+
+    @abstractmethod
+    async def handle(self, view, request, *args, **kwargs):
+        """Response for the action, after authentication and permission checks."""
+
+    @staticmethod
+    async def filtered_queryset(view):
+        # Filters build querysets lazily, but may read the database
+        return await sync_to_async(view.filter_queryset)(view.get_queryset())
+
+
+class AsyncQuestionListView(AsyncViewSetView):
+    viewset_class = QuestionViewSet
+    action = "list"
+    basename = "questions"
+
+    async def handle(self, view, request, *args, **kwargs):
+        queryset = await self.filtered_queryset(view)
+
+        etag, last_modified = await alist_validators(request, queryset, view.paginator)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        paginator = view.paginator
+        if (
+            settings.QUESTION_LIST_ENGINE == "postgres"
+            and not view.include_payload()
+            and paginator.get_ordering(queryset) == paginator.ordering
+        ):
+            body = await sync_to_async(render_question_page)(queryset, paginator, request)
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            page = paginator.get_page_queryset(queryset, request)
+            rows = paginator.build_page([question async for question in page])
+            if view.include_payload():
+                await aattach_payloads(rows)
+            data = view.get_serializer(rows, many=True).data
+            response = paginator.get_paginated_response(data)
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncQuestionDetailView(AsyncViewSetView):
+    viewset_class = QuestionViewSet
+    action = "retrieve"
+    basename = "questions"
+
+    async def handle(self, view, request, *args, **kwargs):
+        queryset = await self.filtered_queryset(view)
+        try:
+            instance = await queryset.aget(pk=kwargs["pk"])
+        except (Question.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise NotFound()
+        view.check_object_permissions(request, instance)
+
+        # One query for the row; the validators come from it
+        etag, last_modified = await aobject_validators(request, instance.pk, instance.updated_at)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        await aattach_payloads([instance])
+        return set_validators(Response(view.get_serializer(instance).data), etag, last_modified)
+
+
+class AsyncTaxonomyListView(AsyncViewSetView):
+    """List of a TaxonomyCacheMixin viewset, sharing its cache versioning."""
+
+    action = "list"
+
+    async def handle(self, view, request, *args, **kwargs):
+        key = await ataxonomy_cache_key(self.basename, self.action, request.get_full_path())
+        data = await cache.aget(key)
+        if data is None:
+            # Filled from the primary, like TaxonomyCacheMixin
+            with primary_reads():
+                queryset = await self.filtered_queryset(view)
+                rows = [row async for row in queryset]
+                data = view.get_serializer(rows, many=True).data
+            await cache.aset(key, data, settings.TAXONOMY_CACHE_TIMEOUT)
+        return Response(data)
+
+
+class AsyncDomainListView(AsyncTaxonomyListView):
+    viewset_class = DomainViewSet
+    basename = "domains"
+
+
+class AsyncTopicListView(AsyncTaxonomyListView):
+    viewset_class = TopicViewSet
+    basename = "topics"
@@ -0,0 +1,311 @@
+# questions/bulk.py
+import codecs
+import csv
+import json
+import uuid
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Domain, Question, Topic
+from .payloads import PAYLOAD_RELATIONS
+from .serializers import (
+    CasePayloadSerializer,
+    DiagramImportPayloadSerializer,
+    MCQPayloadSerializer,
+    NumericalPayloadSerializer,
+    QuestionImportSerializer,
+)
+
+PAYLOAD_SERIALIZERS = {
+    "mcq": MCQPayloadSerializer,
+    "num": NumericalPayloadSerializer,
+    "case": CasePayloadSerializer,
+    "diag": DiagramImportPayloadSerializer,
+}
+
+
+# Row shape shared by export and import: the question fields, domain/topic
+# by slug and the type-specific payload under `payload`.
+EXPORT_FIELDS = [
+    "id",
+    "domain",
+    "topic",
+    "type",
+    "question",
+    "description",
+    "difficulty",
+    "points",
+    "time_estimate_seconds",
+    "is_active",
+    "payload",
+]
+PAYLOAD_FIELDS = {
+    "mcq": ("options", "correct", "shuffle"),
+    "num": ("answer", "unit", "tolerance"),
+    "case": ("rubric",),
+    "diag": ("image", "hotspots"),
+}
+
+
+# --- Readers ----------------------------------------------------------------
+# Both yield (row_number, dict) or (row_number, error message) lazily, so an
+# import never holds more than one chunk in memory.
+def read_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield number, "Each line must be a JSON object."
+            continue
+        yield number, row
+
+
+def read_csv(lines):
+    """
+    CSV rows use the NDJSON keys as columns; `payload` holds the
+    type-specific payload as a JSON string and empty cells are omitted.
+    `lines` is an iterable of UTF-8 encoded byte lines.
+    """
+    reader = csv.DictReader(codecs.iterdecode(lines, "utf-8"))
+    for number, raw in enumerate(reader, start=1):
+        row = {key: value for key, value in raw.items() if key and value != ""}
+        if "payload" in row:
+            try:
+                row["payload"] = json.loads(row["payload"])
+            except ValueError as e:
+                yield number, f"Invalid payload JSON: {e}"
+                continue
+        yield number, row
+
+
+def read_rows(lines, fmt):
+    return read_csv(lines) if fmt == "csv" else read_ndjson(lines)
+
+
+# --- Export -----------------------------------------------------------------
+def export_queryset(queryset=None):
+    """
+    Questions with domain, topic and all payload tables joined in, so the
+    export is one SELECT read through a server-side cursor.
+    """
+    if queryset is None:
+        queryset = Question.objects.all()
+    accessors = [accessor for _, accessor in PAYLOAD_RELATIONS.values()]
+    return queryset.select_related("domain", "topic", *accessors).order_by("created_at", "id")
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield one dict per question in the import format. `iterator()` streams
+    from a server-side cursor in `chunk_size` batches, so memory stays flat
+    however large the bank is.
+    """
+    for question in queryset.iterator(chunk_size=chunk_size):
+        payload = getattr(question, PAYLOAD_RELATIONS[question.type][1], None)
+        yield {
+            "id": str(question.id),
+            "domain": question.domain.slug,
+            "topic": question.topic.slug if question.topic_id else None,
+            "type": question.type,
+            "question": question.question,
+            "description": question.description,
+            "difficulty": question.difficulty,
+            "points": question.points,
+            "time_estimate_seconds": question.time_estimate_seconds,
+            "is_active": question.is_active,
+            "payload": _export_payload(question.type, payload),
+        }
+
+
+def _export_payload(qtype, payload):
+    if payload is None:
+        return None
+    data = {field: getattr(payload, field) for field in PAYLOAD_FIELDS[qtype]}
+    if qtype == "diag":
+        # Stored file name, as accepted back by DiagramImportPayloadSerializer
+        data["image"] = payload.image.name
+    return data
+
+
+def write_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def write_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = {**row, "payload": json.dumps(row["payload"], ensure_ascii=False)}
+        yield writer.writerow(
+            ["" if row[field] is None else row[field] for field in EXPORT_FIELDS]
+        )
+
+
+def write_rows(rows, fmt):
+    return write_csv(rows) if fmt == "csv" else write_ndjson(rows)
+
+
+# --- Importer ---------------------------------------------------------------
+class QuestionImporter:
+    """
+    Bulk question import in chunks.
+
+    Every row is validated with the same rules as the API (question fields via
+    QuestionImportSerializer, payloads via the payload serializers) without
+    any per-row query. Domain/topic references and pre-existing ids are then
+    resolved once per chunk, and the valid rows of a chunk are written with
+    one `bulk_create` for questions plus one per payload type inside a single
+    transaction. Invalid rows are skipped and reported.
+    """
+
+    def __init__(self, chunk_size=1000, author_id=None):
+        self.chunk_size = chunk_size
+        self.author_id = author_id
+        self.created = 0
+        self.errors = []
+        self._domains = {}  # slug and str(id) -> Domain id
+        self._topics = {}  # (domain id, slug) and str(id) -> (Topic id, domain id)
+        self._topic_domains = set()
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk)
+        self.errors.sort(key=lambda error: error["row"])
+        return {"created": self.created, "errors": self.errors}
+
+    def _error(self, number, errors):
+        if not isinstance(errors, dict):
+            errors = {"non_field_errors": [str(errors)]}
+        self.errors.append({"row": number, "errors": errors})
+
+    def _import_chunk(self, chunk):
+        validated = []
+        for number, row in chunk:
+            if isinstance(row, str):
+                self._error(number, row)
+                continue
+            data = self._validate(number, row)
+            if data is not None:
+                validated.append((number, data))
+
+        self._load_references(data for _, data in validated)
+        existing = set(
+            Question.objects.filter(
+                id__in=[data["id"] for _, data in validated if "id" in data]
+            ).values_list("id", flat=True)
+        )
+
+        questions = []
+        payloads = {qtype: [] for qtype in PAYLOAD_RELATIONS}
+        for number, data in validated:
+            payload = data.pop("payload")
+            question = self._build_question(number, data, existing)
+            if question is None:
+                continue
+            payload_model, _ = PAYLOAD_RELATIONS[question.type]
+            questions.append(question)
+            payloads[question.type].append(payload_model(question=question, **payload))
+
+        with transaction.atomic():
+            Question.objects.bulk_create(questions)
+            for qtype, objects in payloads.items():
+                if objects:
+                    PAYLOAD_RELATIONS[qtype][0].objects.bulk_create(objects)
+        self.created += len(questions)
+
+    def _validate(self, number, row):
+        if "payload" not in row:
+            # Also accept the API's `<type>_payload` key
+            row = {**row, "payload": row.get(f"{row.get('type')}_payload")}
+
+        serializer = QuestionImportSerializer(data=row)
+        if not serializer.is_valid():
+            self._error(number, dict(serializer.errors))
+            return None
+        data = dict(serializer.validated_data)
+
+        payload_serializer = PAYLOAD_SERIALIZERS[data["type"]](data=data["payload"])
+        if not payload_serializer.is_valid():
+            self._error(number, {"payload": payload_serializer.errors})
+            return None
+        data["payload"] = dict(payload_serializer.validated_data)
+        return data
+
+    def _build_question(self, number, data, existing):
+        domain_id = self._domains.get(data.pop("domain"))
+        if domain_id is None:
+            self._error(number, {"domain": ["Unknown domain."]})
+            return None
+
+        topic_ref = data.pop("topic", None)
+        topic_id = None
+        if topic_ref:
+            topic = self._topics.get(topic_ref) or self._topics.get((domain_id, topic_ref))
+            if topic is None or topic[1] != domain_id:
+                self._error(number, {"topic": ["Unknown topic for this domain."]})
+                return None
+            topic_id = topic[0]
+
+        if data.get("id") in existing:
+            self._error(number, {"id": ["A question with this id already exists."]})
+            return None
+        if "id" in data:
+            # Duplicates inside the same import count as existing too
+            existing.add(data["id"])
+
+        return Question(
+            domain_id=domain_id,
+            topic_id=topic_id,
+            created_by_id=self.author_id,
+            **data,
+        )
+
+    def _load_references(self, rows):
+        rows = list(rows)
+        wanted = {row["domain"] for row in rows} - set(self._domains)
+        if wanted:
+            for domain_id, slug in Domain.objects.filter(
+                slug__in=wanted
+            ).values_list("id", "slug"):
+                self._domains[slug] = domain_id
+            ids = [ref for ref in wanted if _is_uuid(ref)]
+            for domain_id in Domain.objects.filter(id__in=ids).values_list("id", flat=True):
+                self._domains[str(domain_id)] = domain_id
+
+        domain_ids = {
+            self._domains[row["domain"]]
+            for row in rows
+            if row.get("topic") and row["domain"] in self._domains
+        } - self._topic_domains
+        if domain_ids:
+            for topic_id, domain_id, slug in Topic.objects.filter(
+                domain_id__in=domain_ids
+            ).values_list("id", "domain_id", "slug"):
+                self._topics[(domain_id, slug)] = (topic_id, domain_id)
+                self._topics[str(topic_id)] = (topic_id, domain_id)
+            self._topic_domains |= domain_ids
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,73 @@
+# questions/cache.py
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from backend.router import primary_reads
+from backend.versions import aget_version, bump_version, get_version
+
+
+def get_taxonomy_version():
+    return get_version("taxonomy")
+
+
+async def aget_taxonomy_version():
+    return await aget_version("taxonomy")
+
+
+def bump_taxonomy_version(sender=None, **kwargs):
+    """
+    post_save/post_delete receiver for Domain and Topic.
+
+    Every cached taxonomy response embeds the version in its key, so bumping
+    it makes all of them unreachable at once, in every worker (see
+    backend/versions.py); the stale entries simply age out. Queryset
+    `.update()`/`.delete()` bypass signals and must call this directly.
+    """
+    bump_version("taxonomy")
+
+
+def taxonomy_cache_key(basename, action, full_path):
+    return _taxonomy_cache_key(get_taxonomy_version(), basename, action, full_path)
+
+
+async def ataxonomy_cache_key(basename, action, full_path):
+    return _taxonomy_cache_key(await aget_taxonomy_version(), basename, action, full_path)
+
+
+def _taxonomy_cache_key(version, basename, action, full_path):
+    digest = hashlib.md5(full_path.encode("utf-8")).hexdigest()
+    return f"questions:taxonomy:v{version}:{basename}:{action}:{digest}"
+
+
+class TaxonomyCacheMixin:
+    """
+    Cache successful list/retrieve responses of the Domain/Topic viewsets.
+
+    The key is made of the taxonomy version, the viewset and the full request
+    path (query string included, so filters and search terms get their own
+    entries). Permissions are checked by DRF before the handler runs, so the
+    cache is only ever consulted for authorised requests. A miss is read
+    from the primary even inside a replica-routed request: a lagging replica
+    would otherwise store old rows under the new version.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        key = taxonomy_cache_key(self.basename, self.action, request.get_full_path())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.TAXONOMY_CACHE_TIMEOUT)
+        return response
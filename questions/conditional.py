@@ -0,0 +1,121 @@
+# questions/conditional.py
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from backend.versions import aget_version, bump_version, get_version
+from users.models import CustomUser
+from .cache import aget_taxonomy_version, get_taxonomy_version
+
+
+def get_content_version():
+    return get_version("question_content")
+
+
+async def aget_content_version():
+    return await aget_version("question_content")
+
+
+def bump_content_version(sender=None, **kwargs):
+    """
+    post_save/post_delete receiver for the payload models and the users
+    shown as authors: their changes show in question responses without
+    touching Question.updated_at.
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and sender is CustomUser and "email" not in update_fields:
+        return
+    bump_version("question_content")
+
+
+def _versions():
+    return get_taxonomy_version(), get_content_version()
+
+
+async def _aversions():
+    return await aget_taxonomy_version(), await aget_content_version()
+
+
+def _etag(request, versions, *parts):
+    # The path carries cursor/page_size/include/filters; Accept selects the
+    # renderer and the list engine changes the bytes, so both are part of it.
+    # The versions cover renamed domains/topics/authors and edited payloads
+    # embedded in the output.
+    material = "|".join(
+        str(part)
+        for part in (
+            *parts,
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            settings.QUESTION_LIST_ENGINE,
+            *versions,
+        )
+    )
+    return quote_etag(hashlib.sha256(material.encode("utf-8")).hexdigest())
+
+
+def list_validators(request, queryset, paginator):
+    """
+    ETag for one page of a filtered question list, from the (id, updated_at)
+    of the rows on that page and the look-ahead row. They are read with the
+    page's own keyset seek, so the cost is bounded by the page size however
+    large the bank or deep the page. Edited, deleted, deactivated or new
+    rows on the page change it.
+
+    Lists carry no Last-Modified: no timestamp can show that a row left the
+    page, so If-Modified-Since alone could answer 304 to a stale copy.
+    """
+    window = _page_window(queryset, paginator, request)
+    return _list_validators(request, list(window), _versions())
+
+
+async def alist_validators(request, queryset, paginator):
+    """list_validators() for async views."""
+    window = _page_window(queryset, paginator, request)
+    return _list_validators(request, [row async for row in window], await _aversions())
+
+
+def _page_window(queryset, paginator, request):
+    # A fresh paginator: get_page_queryset() keeps state for the links
+    return type(paginator)().get_page_queryset(queryset, request).values_list("id", "updated_at")
+
+
+def _list_validators(request, rows, versions):
+    material = ",".join(f"{pk}@{updated_at.isoformat()}" for pk, updated_at in rows)
+    return _etag(request, versions, "list", hashlib.sha256(material.encode("utf-8")).hexdigest()), None
+
+
+def object_validators(request, pk, updated_at):
+    return _etag(request, _versions(), "detail", pk, updated_at.isoformat()), updated_at
+
+
+async def aobject_validators(request, pk, updated_at):
+    """object_validators() for async views."""
+    return _etag(request, await _aversions(), "detail", pk, updated_at.isoformat()), updated_at
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Return a 304 (or 412) response when the request's If-None-Match /
+    If-Modified-Since preconditions say the client copy is current, else None.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=timegm(last_modified.utctimetuple()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code not in (200, 304):
+        return response
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
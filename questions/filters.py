@@ -1,5 +1,14 @@
 # In a new file, e.g., questions/filters.py
+from contextlib import contextmanager
+
 import django_filters
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections, transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.lookups import PatternLookup
+from django.db.models.functions import Cast, Greatest
+from rest_framework import filters
 from .models import Question
 
 
@@ -7,7 +16,99 @@ class QuestionFilter(django_filters.FilterSet):
     domain = django_filters.CharFilter(field_name="domain__slug")
     topic = django_filters.CharFilter(field_name="topic__slug")
     # The 'type' filter is already handled by its field name
+    q = django_filters.CharFilter(method="search", label="Full-text search")
 
     class Meta:
         model = Question
-        fields = ["domain", "topic", "type"]
+        fields = ["domain", "topic", "type", "q"]
+
+    def search(self, queryset, name, value):
+        # Matches via the GIN index on search_vector, most relevant first.
+        # The explicit ordering is also the keyset used by the cursor paginator;
+        # ts_rank returns real, cast to double so cursor values round-trip exactly.
+        query = SearchQuery(value, search_type="websearch", config="english")
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-created_at", "-id")
+        )
+
+
+class TrigramContains(PatternLookup):
+    """
+    `field ILIKE '%term%'`. A gin_trgm_ops index on the plain column serves
+    it; `icontains` compiles to `UPPER(field) LIKE UPPER(...)`, which it
+    cannot.
+    """
+
+    lookup_name = "trigram_contains"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", (*lhs_params, *rhs_params)
+
+
+@contextmanager
+def word_similarity_threshold(threshold, using):
+    """Run the block in a transaction whose `%>` operator matches at `threshold`."""
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        # SET LOCAL ends with the transaction, so a reused connection keeps the default
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+        yield
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for DRF's SearchFilter backed by pg_trgm.
+
+    Matches `search_fields` (plain field names) by trigram word similarity
+    with the `%>` operator, which is typo tolerant ("thermodynamcs",
+    "chemcal engineering") and compares the term against the best matching
+    part of the name, as type-ahead needs. ILIKE (TrigramContains) catches
+    short prefixes that share too few trigrams. The gin_trgm_ops index on
+    each field serves both; word_similarity() itself is only computed for
+    the matching rows, to order them.
+
+    The threshold comes from the view's `trigram_similarity_threshold` or the
+    TRIGRAM_SIMILARITY_THRESHOLD setting. `%>` reads it from
+    `pg_trgm.word_similarity_threshold`, which is set for one transaction,
+    so the rows are loaded here, inside it.
+    """
+
+    def get_similarity_threshold(self, view):
+        return getattr(
+            view,
+            "trigram_similarity_threshold",
+            settings.TRIGRAM_SIMILARITY_THRESHOLD,
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        term = " ".join(self.get_search_terms(request))
+        if not search_fields or not term:
+            return queryset
+
+        queryset = self.search(queryset, search_fields, term)
+        with word_similarity_threshold(self.get_similarity_threshold(view), queryset.db):
+            queryset._fetch_all()
+        return queryset
+
+    @staticmethod
+    def search(queryset, search_fields, term):
+        """The matching rows, most similar first; `%>` uses the session threshold."""
+        condition = Q()
+        similarities = []
+        for field in search_fields:
+            condition |= Q(**{f"{field}__trigram_word_similar": term})
+            condition |= TrigramContains(F(field), term)
+            similarities.append(TrigramWordSimilarity(term, field))
+        similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return (
+            queryset.filter(condition)
+            .annotate(search_similarity=similarity)
+            .order_by("-search_similarity", *ordering)
+        )
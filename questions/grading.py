@@ -0,0 +1,205 @@
+# questions/grading.py
+import math
+
+import numpy as np
+
+from .answer_keys import MCQKey, NumericalKey, answer_keys
+from .models import Question
+
+# Submitted MCQ answers that name an unknown option can never match a key
+INVALID_SELECTION = np.uint16(0xFFFF)
+MAX_MCQ_OPTIONS = 15
+
+
+class AnswerKey:
+    """
+    Answer keys of a paper laid out as NumPy arrays.
+
+    Question columns keep the order the key was built with. MCQ keys are
+    bitmasks of the correct options (bit = position of the option id in the
+    sorted option ids), numerical keys are answer/tolerance vectors. Case and
+    diagram questions have no automatic key and are reported as ungraded.
+
+    `entries` is an iterable of (question id, points, key) where the key is a
+    compiled MCQKey/NumericalKey or None (see questions.answer_keys).
+    """
+
+    def __init__(self, entries):
+        self.question_ids = []
+        self.columns = {}  # str(question id) -> column
+        points = []
+        self.mcq_columns, self.mcq_options, mcq_keys = [], [], []
+        self.num_columns, num_answers, num_tolerances = [], [], []
+        self.ungraded = []
+
+        for question_id, question_points, key in entries:
+            column = len(self.question_ids)
+            self.question_ids.append(question_id)
+            self.columns[str(question_id)] = column
+            points.append(question_points)
+
+            if isinstance(key, MCQKey):
+                bits = {option: 1 << bit for bit, option in enumerate(key.options)}
+                if len(bits) > MAX_MCQ_OPTIONS:
+                    raise ValueError(f"Question {question_id} has more than {MAX_MCQ_OPTIONS} options.")
+                self.mcq_columns.append(column)
+                self.mcq_options.append(bits)
+                mcq_keys.append(sum(bits[option] for option in key.correct))
+            elif isinstance(key, NumericalKey):
+                self.num_columns.append(column)
+                num_answers.append(key.answer)
+                num_tolerances.append(key.tolerance)
+            else:
+                self.ungraded.append(question_id)
+
+        self.points = np.asarray(points, dtype=np.int64)
+        self.mcq_keys = np.asarray(mcq_keys, dtype=np.uint16)
+        self.num_answers = np.asarray(num_answers, dtype=np.float64)
+        # Relative tolerance; a zero answer falls back to the tolerance as an absolute bound
+        tolerances = np.asarray(num_tolerances, dtype=np.float64)
+        self.num_bounds = np.where(self.num_answers == 0, tolerances, tolerances * np.abs(self.num_answers))
+
+        # Every subset of a question's options -> bitmask, for fast encoding
+        self._selection_masks = [
+            {
+                frozenset(option for option, bit in bits.items() if mask & bit): mask
+                for mask in range(1 << len(bits))
+            }
+            if len(bits) <= 6
+            else {}
+            for bits in self.mcq_options
+        ]
+
+    @classmethod
+    def for_questions(cls, question_ids):
+        """
+        Build the key of `question_ids` (in that order). Only type and points
+        are read from Question; compiled keys come from the answer-key cache.
+        """
+        rows = {
+            question_id: (qtype, points)
+            for question_id, qtype, points in Question.objects.filter(
+                id__in=question_ids
+            ).values_list("id", "type", "points")
+        }
+        missing = [question_id for question_id in question_ids if question_id not in rows]
+        if missing:
+            raise Question.DoesNotExist(f"Unknown questions: {', '.join(map(str, missing))}")
+        keys = answer_keys.get_many({question_id: qtype for question_id, (qtype, _) in rows.items()})
+        return cls(
+            (question_id, rows[question_id][1], keys[question_id])
+            for question_id in question_ids
+        )
+
+    @property
+    def max_score(self):
+        graded = np.ones(len(self.question_ids), dtype=bool)
+        graded[[self.columns[str(question_id)] for question_id in self.ungraded]] = False
+        return int(self.points[graded].sum())
+
+    def encode(self, submissions):
+        """
+        Turn answer dicts ({question id: [option ids] | number}) into an
+        (n, mcq) uint16 selection matrix and an (n, num) float matrix. Missing
+        or malformed answers encode as never-correct values (0 / NaN).
+
+        Work is done column by column: one list comprehension of dict lookups
+        per question, with the option-set -> bitmask translation served from
+        a per-question table of every possible selection.
+        """
+        selections = np.zeros((len(submissions), len(self.mcq_columns)), dtype=np.uint16)
+        values = np.full((len(submissions), len(self.num_columns)), np.nan)
+
+        for index, column in enumerate(self.mcq_columns):
+            question_id = str(self.question_ids[column])
+            masks = self._selection_masks[index]
+            bits = self.mcq_options[index]
+            answers = [answers.get(question_id) for answers in submissions]
+            lookup = masks.get
+            try:
+                # Fast path for lists of option ids; anything else comes out as None
+                encoded = [
+                    lookup(frozenset(answer)) if type(answer) is list else None
+                    for answer in answers
+                ]
+            except TypeError:  # unhashable items in a list
+                encoded = [None] * len(answers)
+            selections[:, index] = [
+                mask if mask is not None else _selection_mask(masks, bits, answer)
+                for mask, answer in zip(encoded, answers)
+            ]
+
+        for index, column in enumerate(self.num_columns):
+            question_id = str(self.question_ids[column])
+            answers = [answers.get(question_id) for answers in submissions]
+            try:
+                # None becomes NaN; numbers and numeric strings convert in C
+                values[:, index] = np.array(answers, dtype=np.float64)
+            except (TypeError, ValueError):
+                values[:, index] = [_number(answer) for answer in answers]
+        return selections, values
+
+    def grade(self, submissions):
+        """
+        Grade a batch of answer dicts. Returns an (n, questions) boolean
+        correctness matrix and the (n,) points-weighted scores.
+        """
+        selections, values = self.encode(submissions)
+        correct = np.zeros((len(submissions), len(self.question_ids)), dtype=bool)
+        # MCQ: the selected set must equal the correct set, i.e. equal bitmasks
+        correct[:, self.mcq_columns] = selections == self.mcq_keys
+        # Numerical: |given - answer| <= tolerance * |answer|; NaN never passes
+        correct[:, self.num_columns] = np.abs(values - self.num_answers) <= self.num_bounds
+        return correct, correct @ self.points
+
+
+def grade_batch(question_ids, submissions):
+    """
+    Grade `submissions` ([{"candidate", "answers"}]) against the questions of
+    a paper and summarise per candidate and per question.
+    """
+    key = AnswerKey.for_questions(question_ids)
+    correct, scores = key.grade([submission["answers"] for submission in submissions])
+    counts = correct.sum(axis=1)
+    rates = correct.mean(axis=0) if len(submissions) else np.zeros(len(question_ids))
+    ungraded = {str(question_id) for question_id in key.ungraded}
+    return {
+        "max_score": key.max_score,
+        "ungraded": key.ungraded,
+        "results": [
+            {"candidate": submission["candidate"], "score": int(score), "correct": int(count)}
+            for submission, score, count in zip(submissions, scores.tolist(), counts.tolist())
+        ],
+        "questions": [
+            {"question": question_id, "correct_rate": round(float(rate), 4)}
+            for question_id, rate in zip(key.question_ids, rates.tolist())
+            if str(question_id) not in ungraded
+        ],
+    }
+
+
+def _selection_mask(masks, bits, answer):
+    if answer is None:
+        return 0
+    if isinstance(answer, str):
+        answer = [answer]
+    if not isinstance(answer, (list, tuple)):
+        return INVALID_SELECTION
+    try:
+        return masks[frozenset(answer)]
+    except (KeyError, TypeError):
+        pass
+    mask = 0
+    for option in answer:
+        bit = bits.get(option) if isinstance(option, str) else None
+        if bit is None:
+            return INVALID_SELECTION
+        mask |= bit
+    return mask
+
+
+def _number(answer):
+    try:
+        return float(answer)
+    except (TypeError, ValueError):
+        return math.nan
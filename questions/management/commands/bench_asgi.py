@@ -0,0 +1,164 @@
+import asyncio
+import io
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/second of one worker on an API read endpoint: a WSGI worker "
+        "serving the sync endpoint one request at a time against the ASGI "
+        "application serving the async endpoint to concurrent clients. "
+        "--latency adds a simulated database round trip to every query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="questions/?page_size=20",
+                            help="Path below /api/v1/ (and /api/v1/async/).")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--latency", type=float, default=5.0, help="Milliseconds added per query.")
+
+    def handle(self, *args, **options):
+        latency = options["latency"] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # Fired on every reconnect of the same wrapper
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        user = CustomUser.objects.create_user(
+            email=f"bench-asgi-{uuid.uuid4().hex[:8]}@example.com",
+            first_name="Bench",
+            last_name="Asgi",
+            role="administrator",
+        )
+        token = f"Bearer {AccessToken.for_user(user)}"
+        connection_created.connect(add_latency)
+        for connection in connections.all(initialized_only=True):
+            add_latency(None, connection)
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                wsgi = self._wsgi(f"/api/v1/{options['path']}", token, options["requests"])
+                asgi = asyncio.run(
+                    self._asgi(
+                        f"/api/v1/async/{options['path']}", token,
+                        options["requests"], options["concurrency"],
+                    )
+                )
+        finally:
+            connection_created.disconnect(add_latency)
+            for connection in connections.all(initialized_only=True):
+                if slow_query in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(slow_query)
+            user.delete()
+
+        n = options["requests"]
+        self.stdout.write(f"path             /api/v1/[async/]{options['path']}")
+        self.stdout.write(f"requests         {n}, +{options['latency']:.1f} ms per query")
+        self.stdout.write(f"wsgi (1 at once) {n / wsgi:>8.1f} req/s ({wsgi:.2f} s)")
+        self.stdout.write(
+            f"asgi ({options['concurrency']} clients) {n / asgi:>8.1f} req/s ({asgi:.2f} s)"
+        )
+
+    # The applications are called directly, as a server would: the test
+    # clients skip parts of the request cycle (per-request thread contexts,
+    # closing connections) that matter here.
+    def _wsgi(self, path, token, count):
+        application = get_wsgi_application()
+        url = urlsplit(path)
+
+        def request():
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": url.path,
+                "QUERY_STRING": url.query,
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "HTTP_AUTHORIZATION": token,
+                "wsgi.input": io.BytesIO(),
+                "wsgi.url_scheme": "http",
+            }
+            status = []
+            body = b"".join(application(environ, lambda s, h, *a: status.append(s)))
+            return status[0], body
+
+        self._check(*request())
+        start = time.perf_counter()
+        for _ in range(count):
+            request()
+        return time.perf_counter() - start
+
+    async def _asgi(self, path, token, count, concurrency):
+        application = get_asgi_application()
+        url = urlsplit(path)
+
+        async def request():
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": url.path,
+                "raw_path": url.path.encode(),
+                "query_string": url.query.encode(),
+                "headers": [(b"host", b"localhost"), (b"authorization", token.encode())],
+                "server": ("localhost", 80),
+                "client": ("127.0.0.1", 0),
+            }
+            done = asyncio.Event()
+            received = []
+
+            async def receive():
+                if not received:
+                    received.append(True)
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await done.wait()
+                return {"type": "http.disconnect"}
+
+            status, body = [], []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(str(message["status"]))
+                elif message["type"] == "http.response.body":
+                    body.append(message.get("body", b""))
+                    if not message.get("more_body"):
+                        done.set()
+
+            await application(scope, receive, send)
+            return status[0], b"".join(body)
+
+        self._check(*await request())
+        queue = asyncio.Queue()
+        for _ in range(count):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                await request()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def _check(self, status, body):
+        if not status.startswith("200"):
+            raise SystemExit(f"{status}: {body[:200]!r}")
@@ -0,0 +1,91 @@
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from questions.answer_keys import MCQKey, NumericalKey
+from questions.grading import AnswerKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade a synthetic batch (default 10k candidates x 100 questions, half MCQ, "
+        "half numerical) with the vectorised engine and a plain Python loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidates", type=int, default=10_000)
+        parser.add_argument("--questions", type=int, default=100)
+        parser.add_argument("--python-sample", type=int, default=1_000,
+                            help="Candidates graded by the Python loop (extrapolated).")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        key, questions = self._answer_key(rng, options["questions"])
+        submissions = self._submissions(rng, questions, options["candidates"])
+
+        start = time.perf_counter()
+        key.encode(submissions)
+        encode = time.perf_counter() - start
+
+        start = time.perf_counter()
+        correct, scores = key.grade(submissions)
+        total = time.perf_counter() - start
+
+        sample = submissions[: options["python_sample"]]
+        start = time.perf_counter()
+        reference = [self._grade_python(questions, answers) for answers in sample]
+        python = (time.perf_counter() - start) * len(submissions) / max(len(sample), 1)
+
+        if reference != scores[: len(sample)].tolist():
+            self.stderr.write(self.style.ERROR("Vectorised scores differ from the reference!"))
+
+        n, q = len(submissions), len(questions)
+        self.stdout.write(f"batch            {n} candidates x {q} questions")
+        self.stdout.write(f"encode           {encode * 1000:>9.1f} ms")
+        self.stdout.write(f"numpy scoring    {max(total - encode, 0) * 1000:>9.1f} ms")
+        self.stdout.write(f"grade() total    {total * 1000:>9.1f} ms")
+        self.stdout.write(f"python loop      {python * 1000:>9.1f} ms (extrapolated from {len(sample)})")
+        self.stdout.write(f"mean score       {scores.mean():.2f} / {key.max_score}")
+
+    def _answer_key(self, rng, count):
+        questions = []
+        for i in range(count):
+            question_id = uuid.uuid4()
+            points = int(rng.integers(1, 4))
+            if i % 2:
+                options = tuple(sorted(str(uuid.uuid4()) for _ in range(4)))
+                correct = [options[n] for n in rng.choice(4, size=int(rng.integers(1, 3)), replace=False)]
+                key = MCQKey(options, frozenset(correct))
+            else:
+                key = NumericalKey(float(rng.uniform(-100, 100)), 0.02, "")
+            questions.append((question_id, points, key))
+        return AnswerKey(questions), questions
+
+    def _submissions(self, rng, questions, count):
+        submissions = []
+        for _ in range(count):
+            answers = {}
+            for question_id, _, key in questions:
+                if isinstance(key, MCQKey):
+                    picked = key.correct if rng.random() < 0.6 else [key.options[int(rng.integers(4))]]
+                    answers[str(question_id)] = list(picked)
+                else:
+                    answers[str(question_id)] = key.answer * float(rng.uniform(0.97, 1.03))
+            submissions.append(answers)
+        return submissions
+
+    @staticmethod
+    def _grade_python(questions, answers):
+        score = 0
+        for question_id, points, key in questions:
+            given = answers.get(str(question_id))
+            if isinstance(key, MCQKey):
+                ok = isinstance(given, list) and set(given) == key.correct
+            else:
+                bound = key.tolerance * abs(key.answer) if key.answer else key.tolerance
+                ok = given is not None and abs(given - key.answer) <= bound
+            score += points if ok else 0
+        return score
@@ -0,0 +1,94 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from questions.models import Domain, Question, Topic
+from questions.pagination import QuestionCursorPagination
+from questions.pg_json import render_question_page
+from questions.serializers import QuestionListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare CPU time per question-list request between the DRF serializer "
+        "engine and the PostgreSQL JSON engine for several page sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,50,100,500,1000")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Insert this many throw-away questions first (rolled back afterwards).",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+
+        with transaction.atomic():
+            if options["seed"]:
+                self._seed(options["seed"])
+
+            self.stdout.write(
+                f"{'page':>6} {'engine':>10} {'cpu ms/req':>11} {'wall ms/req':>12}"
+            )
+            for size in sizes:
+                for engine, render in (
+                    ("serializer", self._render_serializer),
+                    ("postgres", self._render_postgres),
+                ):
+                    cpu, wall = self._measure(render, size, options["repeat"])
+                    self.stdout.write(
+                        f"{size:>6} {engine:>10} {cpu:>11.2f} {wall:>12.2f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def _measure(self, render, size, repeat):
+        request = Request(APIRequestFactory().get("/", {"page_size": size}))
+        render(request)  # warm-up
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(repeat):
+            render(request)
+        cpu = (time.process_time() - cpu_start) * 1000 / repeat
+        wall = (time.perf_counter() - wall_start) * 1000 / repeat
+        return cpu, wall
+
+    def _queryset(self):
+        return Question.objects.select_related("domain", "topic", "created_by").filter(
+            is_active=True
+        )
+
+    def _render_serializer(self, request):
+        paginator = QuestionCursorPagination()
+        paginator.max_page_size = None
+        page = paginator.paginate_queryset(self._queryset(), request)
+        data = QuestionListSerializer(page, many=True).data
+        return JSONRenderer().render(paginator.get_paginated_response(data).data)
+
+    def _render_postgres(self, request):
+        paginator = QuestionCursorPagination()
+        paginator.max_page_size = None
+        return render_question_page(self._queryset(), paginator, request)
+
+    def _seed(self, count):
+        domain = Domain.objects.create(name=f"bench-{uuid.uuid4().hex[:8]}")
+        topic = Topic.objects.create(domain=domain, name="Bench topic")
+        Question.objects.bulk_create(
+            Question(
+                domain=domain,
+                topic=topic if i % 2 else None,
+                type="num",
+                question=f"Benchmark question {i}",
+                description="Generated by bench_question_list",
+            )
+            for i in range(count)
+        )
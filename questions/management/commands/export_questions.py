@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from questions.bulk import export_queryset, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = "Stream every question as NDJSON or CSV, readable by import_questions ('-' writes stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-")
+        parser.add_argument("--format", choices=["ndjson", "csv"])
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        lines = write_rows(export_rows(export_queryset(), options["chunk_size"]), fmt)
+
+        if path == "-":
+            sys.stdout.writelines(lines)
+            return
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as target:
+            for line in lines:
+                target.write(line)
+                count += 1
+        if fmt == "csv":
+            count -= 1  # header
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} questions to {path}."))
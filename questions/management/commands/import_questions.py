@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from questions.bulk import QuestionImporter, read_rows
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Bulk import questions from an NDJSON or CSV file ('-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["ndjson", "csv"])
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--author", help="Email of the user recorded as created_by.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+
+        author_id = None
+        if options["author"]:
+            try:
+                author_id = CustomUser.objects.get(email=options["author"].lower()).pk
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['author']}")
+
+        importer = QuestionImporter(chunk_size=options["chunk_size"], author_id=author_id)
+        if path == "-":
+            report = importer.run(read_rows(sys.stdin.buffer, fmt))
+        else:
+            with open(path, "rb") as source:
+                report = importer.run(read_rows(source, fmt))
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} questions, {len(report['errors'])} rows rejected."
+            )
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:26
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0009_question_created_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(models.Func(models.Func(models.F('question'), models.Value('\\\\[A-Za-z]+'), models.Value(' '), models.Value('g'), function='regexp_replace', output_field=models.TextField()), models.Value('[$^_{}\\\\]'), models.Value(' '), models.Value('g'), function='regexp_replace', output_field=models.TextField()), config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector(models.Func(models.Func(models.F('description'), models.Value('\\\\[A-Za-z]+'), models.Value(' '), models.Value('g'), function='regexp_replace', output_field=models.TextField()), models.Value('[$^_{}\\\\]'), models.Value(' '), models.Value('g'), function='regexp_replace', output_field=models.TextField()), config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='question_search_vector_idx'),
+        ),
+    ]
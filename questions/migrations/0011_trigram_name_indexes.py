@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:37
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0010_question_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='domain',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='domain_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='topic_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
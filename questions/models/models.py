@@ -1,5 +1,7 @@
 # questions/models.py
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.forms import ValidationError
@@ -7,6 +9,30 @@ from django.utils.text import slugify
 from . import models_payload as payload
 
 
+def _searchable_text(field):
+    """
+    Strip LaTeX markup before indexing: control words such as \\frac or
+    \\alpha and the $ ^ _ { } \\ characters of $$...$$ fragments are replaced
+    by spaces, so math only contributes its operands to the search vector.
+    """
+    without_commands = models.Func(
+        models.F(field),
+        models.Value(r"\\[A-Za-z]+"),
+        models.Value(" "),
+        models.Value("g"),
+        function="regexp_replace",
+        output_field=models.TextField(),
+    )
+    return models.Func(
+        without_commands,
+        models.Value(r"[$^_{}\\]"),
+        models.Value(" "),
+        models.Value("g"),
+        function="regexp_replace",
+        output_field=models.TextField(),
+    )
+
+
 # ----------------------------------------------------------------------
 # 1. Domain – Chemical, Mechanical, Textiles, etc.
 # ----------------------------------------------------------------------
@@ -41,6 +67,10 @@ class Domain(models.Model):
     class Meta:
         verbose_name = "Domains"
         ordering = ["name"]
+        indexes = [
+            # Trigram search (TrigramSearchFilter)
+            GinIndex(fields=["name"], name="domain_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -95,6 +125,10 @@ class Topic(models.Model):
     class Meta:
         unique_together = ("domain", "slug")
         ordering = ["name"]
+        indexes = [
+            # Trigram search (TrigramSearchFilter)
+            GinIndex(fields=["name"], name="topic_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -108,6 +142,17 @@ class Topic(models.Model):
 # ----------------------------------------------------------------------
 # 3. Question – Core entity
 # ----------------------------------------------------------------------
+class QuestionManager(models.Manager):
+    """
+    Leaves the stored search_vector out of every query: it is only ever
+    matched in SQL, and loading it would add a tsvector to each row of the
+    lists, exports and papers.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
 class Question(models.Model):
     """
     Core assessment item for engineering employment testing.
@@ -126,11 +171,14 @@ class Question(models.Model):
     created_by : ForeignKey(CustomUser, SET_NULL), Author (SME). Nullable.
     created_at / updated_at : DateTimeField, Auto-managed timestamps.
     is_active : BooleanField, Default True. Soft-delete flag.
+    search_vector : GeneratedField(tsvector), Stored full-text vector of question (weight A)
+        and description (weight B) with LaTeX markup stripped. Maintained by Postgres on write;
+        deferred by the default manager.
 
     Constraints
     -----------
-    Indexes: (domain, type), difficulty, topic
-    Ordering: newest first (-created_at)
+    Indexes: (domain, type), difficulty, topic, (-created_at, -id), GIN(search_vector)
+    Ordering: newest first (-created_at, -id); `id` breaks ties for cursor pagination
 
     Behavior
     --------
@@ -203,13 +251,27 @@ class Question(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    # Full-text search
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            _searchable_text("question"), weight="A", config="english"
+        )
+        + SearchVector(_searchable_text("description"), weight="B", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = QuestionManager()
+
     class Meta:
         indexes = [
             models.Index(fields=["domain", "type"]),
             models.Index(fields=["difficulty"]),
             models.Index(fields=["topic"]),
+            models.Index(fields=["-created_at", "-id"], name="question_created_id_idx"),
+            GinIndex(fields=["search_vector"], name="question_search_vector_idx"),
         ]
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
 
     def __str__(self):
         # Safe fallback
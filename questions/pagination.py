@@ -0,0 +1,222 @@
+# questions/pagination.py
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple("Cursor", ["keys", "reverse"])
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a unique ordering.
+
+    Instead of OFFSET, every page is located with a WHERE clause on the
+    ordering columns, e.g. for ("-created_at", "-id"):
+
+        created_at <= x AND (created_at < x OR (created_at = x AND id < y))
+
+    so a deep page is an index range scan just like the first one. The
+    cursors handed out in `next`/`previous` are opaque base64 tokens holding
+    the keys of the boundary row and the paging direction.
+
+    The keyset is `ordering` unless the queryset was explicitly ordered (e.g.
+    by a search rank annotation), in which case that ordering is used. Either
+    way it must end in a unique column, otherwise rows sharing the same keys
+    could be skipped between pages.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.get_page_queryset(queryset, request))
+        return self.build_page(rows)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the sliced queryset for the requested page. It fetches one row
+        more than the page size, which tells `build_page` whether more rows
+        exist in the paging direction.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request, queryset)
+
+        ordering = self.keys
+        if self.cursor is not None:
+            if self.cursor.reverse:
+                ordering = [self._flip(field) for field in ordering]
+            queryset = queryset.filter(self._seek_condition(ordering, self.cursor.keys))
+
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def build_page(self, rows, get_keys=None):
+        """
+        Trim the look-ahead row, restore display order and remember the
+        boundary keys used to build the next/previous links.
+        """
+        get_keys = get_keys or self._get_keys
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        # An empty page reached through a cursor still links back to where it started
+        fallback = self.cursor.keys if self.cursor is not None else None
+        self.first_keys = get_keys(rows[0]) if rows else fallback
+        self.last_keys = get_keys(rows[-1]) if rows else fallback
+        return rows
+
+    def get_ordering(self, queryset):
+        return tuple(queryset.query.order_by) or tuple(self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        if self.max_page_size:
+            return min(page_size, self.max_page_size)
+        return page_size
+
+    # --- Cursors ------------------------------------------------------------
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            raw_keys = payload["k"]
+            if len(raw_keys) != len(self.keys):
+                raise ValueError("Cursor does not match the ordering.")
+            keys = [
+                self._key_field(queryset, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.keys, raw_keys)
+            ]
+            return Cursor(keys=keys, reverse=bool(payload.get("r")))
+        except (TypeError, ValueError, KeyError, DjangoValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, keys, reverse):
+        payload = {"k": [self._encode_value(value) for value in keys]}
+        if reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_keys is None:
+            return None
+        return self.encode_cursor(self.last_keys, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_keys is None:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.first_keys, reverse=True)
+
+    # --- Responses ----------------------------------------------------------
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    # --- Helpers ------------------------------------------------------------
+    def _get_keys(self, row):
+        return [getattr(row, field.lstrip("-")) for field in self.keys]
+
+    @staticmethod
+    def _key_field(queryset, name):
+        # Keys are model fields or annotations such as a search rank
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _seek_condition(ordering, keys):
+        # Expands the row comparison (a, b) < (x, y) into
+        # a <= x AND (a < x OR (a = x AND b < y)); the leading bound lets
+        # Postgres use it as an index range condition.
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, keys):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": keys[0]}) & condition
+
+    @staticmethod
+    def _encode_value(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return str(value)
+
+
+class QuestionCursorPagination(KeysetCursorPagination):
+    # Matches Question.Meta.ordering and the (created_at, id) index
+    ordering = ("-created_at", "-id")
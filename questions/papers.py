@@ -0,0 +1,215 @@
+# questions/papers.py
+import random
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+from .models import Question
+
+Candidate = namedtuple("Candidate", ["id", "points", "time"])
+
+BUDGET_ATTEMPTS = 20
+
+
+class PaperError(Exception):
+    """The bank cannot satisfy the requested paper constraints."""
+
+
+class QuestionIndex:
+    """
+    In-memory index of active question ids per
+    (domain slug, topic slug, type, difficulty) bucket.
+
+    It is rebuilt with a single narrow query once it is older than
+    QUESTION_INDEX_TTL_SECONDS, so paper generation never scans the Question
+    table. The index is per process and may be up to one TTL stale; questions
+    deactivated in the meantime are dropped when the paper is loaded.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.buckets = {}
+        self.built_at = None
+        self._lock = threading.Lock()
+
+    def get_ttl(self):
+        return settings.QUESTION_INDEX_TTL_SECONDS if self.ttl is None else self.ttl
+
+    def get_buckets(self):
+        if self.built_at is None or time.monotonic() - self.built_at >= self.get_ttl():
+            with self._lock:
+                # Another thread may have rebuilt it while we waited
+                if self.built_at is None or time.monotonic() - self.built_at >= self.get_ttl():
+                    self.refresh()
+        return self.buckets
+
+    def refresh(self):
+        buckets = defaultdict(list)
+        rows = Question.objects.filter(is_active=True, domain__is_active=True).values_list(
+            "id", "domain__slug", "topic__slug", "type", "difficulty", "points", "time_estimate_seconds"
+        )
+        for qid, domain, topic, qtype, difficulty, points, seconds in rows.iterator(chunk_size=5000):
+            buckets[(domain, topic, qtype, difficulty)].append(Candidate(qid, points, seconds))
+        # Swap in a complete index; readers never see a half-built one
+        self.buckets = {key: tuple(candidates) for key, candidates in buckets.items()}
+        self.built_at = time.monotonic()
+
+    def invalidate(self):
+        self.built_at = None
+
+    def candidates(self, domain, topic=None, qtype=None):
+        """Candidates of a section, grouped by difficulty."""
+        by_difficulty = defaultdict(list)
+        for (b_domain, b_topic, b_type, difficulty), candidates in self.get_buckets().items():
+            if b_domain != domain:
+                continue
+            if topic is not None and b_topic != topic:
+                continue
+            if qtype is not None and b_type != qtype:
+                continue
+            by_difficulty[difficulty].extend(candidates)
+        return by_difficulty
+
+
+question_index = QuestionIndex()
+
+
+def allocate(count, distribution):
+    """
+    Split `count` questions over difficulties proportionally to the weights
+    in `distribution` ({difficulty: weight}) with the largest remainder
+    method, so the parts always add up to `count`.
+    """
+    total = sum(distribution.values())
+    if total <= 0:
+        raise PaperError("The difficulty distribution must have a positive weight.")
+    shares = {level: count * weight / total for level, weight in distribution.items()}
+    counts = {level: int(share) for level, share in shares.items()}
+    remainder = count - sum(counts.values())
+    for level in sorted(shares, key=lambda level: shares[level] - counts[level], reverse=True)[:remainder]:
+        counts[level] += 1
+    return {level: n for level, n in counts.items() if n}
+
+
+def generate_paper(sections, difficulty=None, max_points=None, max_time_seconds=None, seed=None, index=None):
+    """
+    Pick question ids for a paper from the in-memory index.
+
+    `sections` is a list of {"domain", "topic", "type", "count"}; `difficulty`
+    an optional {difficulty: weight} distribution applied to every section.
+    Each slot draws uniformly at random among unused candidates of its bucket
+    group that still leave room in the points/time budgets for the cheapest
+    way to fill the remaining slots, so budgets are met without backtracking.
+
+    Raises PaperError when a bucket is too small or a budget cannot be met.
+    """
+    index = index or question_index
+    rng = random.Random(seed)
+
+    slots = []  # one candidate list per question to pick
+    for section in sections:
+        label = "/".join(filter(None, (section["domain"], section.get("topic"), section.get("type"))))
+        groups = index.candidates(section["domain"], section.get("topic"), section.get("type"))
+        if difficulty:
+            wanted = allocate(section["count"], difficulty)
+        else:
+            groups = {None: [c for candidates in groups.values() for c in candidates]}
+            wanted = {None: section["count"]}
+        for level, n in wanted.items():
+            candidates = groups.get(level, [])
+            if len(candidates) < n:
+                where = label if level is None else f"{label} at difficulty {level}"
+                raise PaperError(f"Only {len(candidates)} questions available for {where}, {n} requested.")
+            slots.extend([candidates] * n)
+
+    # Fill the narrowest slots first so broad sections cannot starve them
+    order = sorted(range(len(slots)), key=lambda i: len(slots[i]))
+    slots = [slots[i] for i in order]
+
+    # Cheapest completion of the slots after position i, per budget
+    reserve_points, reserve_time = [0] * len(slots), [0] * len(slots)
+    for i in range(len(slots) - 1, 0, -1):
+        reserve_points[i - 1] = reserve_points[i] + min(c.points for c in slots[i])
+        reserve_time[i - 1] = reserve_time[i] + min(c.time for c in slots[i])
+
+    budget = (
+        float("inf") if max_points is None else max_points,
+        float("inf") if max_time_seconds is None else max_time_seconds,
+    )
+    # The reserve ignores that slots can compete for the same cheap
+    # questions, so a dead end under a tight budget gets a few fresh draws
+    for _ in range(BUDGET_ATTEMPTS):
+        picks = _draw(rng, slots, reserve_points, reserve_time, budget)
+        if picks is not None:
+            # Back to section order
+            return [pick for _, pick in sorted(zip(order, picks))]
+    raise PaperError("No combination of questions fits the points/time budget.")
+
+
+def check_paper(questions, sections, difficulty=None, max_points=None, max_time_seconds=None, **kwargs):
+    """
+    Re-check a drawn paper against its constraints using the loaded rows
+    (in section order, as returned by generate_paper) rather than the index,
+    which may predate edits to points, time, difficulty or taxonomy.
+
+    Raises PaperError naming the first constraint that is not met.
+    """
+    expected = sum(section["count"] for section in sections)
+    if len(questions) != expected:
+        raise PaperError(f"Only {len(questions)} of the {expected} drawn questions are still available.")
+
+    start = 0
+    for section in sections:
+        label = "/".join(filter(None, (section["domain"], section.get("topic"), section.get("type"))))
+        rows = questions[start : start + section["count"]]
+        start += section["count"]
+        for question in rows:
+            if (
+                question.domain.slug != section["domain"]
+                or (section.get("topic") is not None and getattr(question.topic, "slug", None) != section["topic"])
+                or (section.get("type") is not None and question.type != section["type"])
+            ):
+                raise PaperError(f"Question {question.id} no longer belongs to {label}.")
+        if difficulty:
+            levels = defaultdict(int)
+            for question in rows:
+                levels[question.difficulty] += 1
+            if dict(levels) != allocate(section["count"], difficulty):
+                raise PaperError(f"The difficulty distribution of {label} is no longer met.")
+
+    if max_points is not None and sum(question.points for question in questions) > max_points:
+        raise PaperError("The paper exceeds the points budget.")
+    if max_time_seconds is not None and sum(question.time_estimate_seconds for question in questions) > max_time_seconds:
+        raise PaperError("The paper exceeds the time budget.")
+
+
+def _draw(rng, slots, reserve_points, reserve_time, budget):
+    points_left, time_left = budget
+    chosen = set()
+    picks = []
+    for i, candidates in enumerate(slots):
+        pick = None
+        # Random probing first; a full shuffle only when the budget gets tight
+        for candidate in _random_order(rng, candidates):
+            if (
+                candidate.id not in chosen
+                and candidate.points + reserve_points[i] <= points_left
+                and candidate.time + reserve_time[i] <= time_left
+            ):
+                pick = candidate
+                break
+        if pick is None:
+            return None
+        chosen.add(pick.id)
+        picks.append(pick)
+        points_left -= pick.points
+        time_left -= pick.time
+    return picks
+
+
+def _random_order(rng, candidates, probes=8):
+    for _ in range(min(probes, len(candidates))):
+        yield candidates[rng.randrange(len(candidates))]
+    yield from rng.sample(candidates, len(candidates))
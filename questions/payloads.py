@@ -0,0 +1,62 @@
+# questions/payloads.py
+from collections import defaultdict
+
+from .models import Question, MCQPayload, NumericalPayload, CasePayload, DiagramPayload
+
+# Question.type -> (payload model, reverse OneToOne accessor on Question)
+PAYLOAD_RELATIONS = {
+    "mcq": (MCQPayload, "mcq_payload"),
+    "num": (NumericalPayload, "num_payload"),
+    "case": (CasePayload, "case_payload"),
+    "diag": (DiagramPayload, "diag_payload"),
+}
+
+
+def attach_payloads(questions):
+    """
+    Load the type-specific payload of every question in `questions` with at
+    most one query per payload table.
+
+    Questions are grouped by `type` and each payload table is read once with
+    `question_id IN (...)`. The result is stored in the reverse OneToOne cache
+    of every accessor (None for the non-matching ones), so serializing the
+    questions afterwards issues no further payload queries regardless of how
+    many questions there are.
+    """
+    questions = list(questions)
+    loaded = {}
+    for payload_model, ids in _payload_ids(questions):
+        for payload in payload_model.objects.filter(question_id__in=ids):
+            loaded[payload.question_id] = payload
+    return _cache_payloads(questions, loaded)
+
+
+async def aattach_payloads(questions):
+    """attach_payloads() for async views, with the async ORM."""
+    questions = list(questions)
+    loaded = {}
+    for payload_model, ids in _payload_ids(questions):
+        async for payload in payload_model.objects.filter(question_id__in=ids):
+            loaded[payload.question_id] = payload
+    return _cache_payloads(questions, loaded)
+
+
+def _payload_ids(questions):
+    ids_by_type = defaultdict(list)
+    for question in questions:
+        ids_by_type[question.type].append(question.pk)
+    for qtype, ids in ids_by_type.items():
+        payload_model, _ = PAYLOAD_RELATIONS.get(qtype, (None, None))
+        if payload_model is not None:
+            yield payload_model, ids
+
+
+def _cache_payloads(questions, loaded):
+    for question in questions:
+        payload = loaded.get(question.pk)
+        for qtype, (_, accessor) in PAYLOAD_RELATIONS.items():
+            relation = Question._meta.get_field(accessor)
+            relation.set_cached_value(
+                question, payload if qtype == question.type else None
+            )
+    return questions
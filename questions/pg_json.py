@@ -0,0 +1,112 @@
+# questions/pg_json.py
+import json
+
+from django.db import connections
+
+from .models import Domain, Question, Topic
+from users.models import CustomUser
+
+
+def _iso_timestamp(column):
+    # Same text DRF's DateTimeField produces with TIME_ZONE = "UTC":
+    # microseconds only when non-zero and a trailing "Z" instead of +00:00.
+    return (
+        f"to_char({column} AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS') || "
+        f"CASE WHEN date_trunc('second', {column}) = {column} THEN '' "
+        f"ELSE to_char({column} AT TIME ZONE 'UTC', '.US') END || 'Z'"
+    )
+
+
+QUESTION_PAGE_SQL = """
+WITH page AS (
+    SELECT
+        keys.id,
+        keys.created_at,
+        row_number() OVER (ORDER BY keys.created_at {direction}, keys.id {direction}) AS position
+    FROM ({page_sql}) AS keys
+),
+docs AS (
+    SELECT
+        page.position,
+        page.created_at,
+        page.id,
+        json_build_object(
+            'id', q.id,
+            'domain', json_build_object('id', d.id, 'name', d.name),
+            'topic', CASE WHEN t.id IS NULL THEN NULL
+                          ELSE json_build_object('id', t.id, 'name', t.name, 'slug', t.slug) END,
+            'type', q.type,
+            'question', q.question,
+            'description', q.description,
+            'difficulty', q.difficulty,
+            'points', q.points,
+            'time_estimate_seconds', q.time_estimate_seconds,
+            'created_by', u.email,
+            'created_at', {created_at},
+            'updated_at', {updated_at},
+            'is_active', q.is_active
+        ) AS doc
+    FROM page
+    JOIN {question_table} q ON q.id = page.id
+    JOIN {domain_table} d ON d.id = q.domain_id
+    LEFT JOIN {topic_table} t ON t.id = q.topic_id
+    LEFT JOIN {user_table} u ON u.id = q.created_by_id
+)
+SELECT
+    coalesce(
+        json_agg(doc ORDER BY position {display}) FILTER (WHERE position <= %s),
+        '[]'::json
+    )::text,
+    coalesce(array_agg(created_at ORDER BY position), '{{}}'),
+    coalesce(array_agg(id ORDER BY position), '{{}}')
+FROM docs
+"""
+
+
+def render_question_page(queryset, paginator, request):
+    """
+    Render one page of the question list as JSON bytes, assembled by
+    PostgreSQL in a single query.
+
+    The output matches `QuestionListSerializer` wrapped in the keyset
+    paginator's {"next", "previous", "results"} envelope. Filtering and the
+    cursor seek condition come from the regular queryset/paginator; Postgres
+    joins domain, topic and author and builds every row with
+    `json_build_object`/`json_agg`, so Python never instantiates a model or a
+    serializer and only splices the resulting text into the envelope.
+
+    `str(created_by)` is the user's email, which is what the SQL emits.
+    """
+    page_qs = paginator.get_page_queryset(queryset.values("id", "created_at"), request)
+    page_sql, params = page_qs.query.get_compiler(using=page_qs.db).as_sql()
+
+    reverse = paginator.cursor is not None and paginator.cursor.reverse
+    sql = QUESTION_PAGE_SQL.format(
+        page_sql=page_sql,
+        direction="ASC" if reverse else "DESC",
+        # Rows of a "previous" page are fetched oldest first; flip them back
+        display="DESC" if reverse else "ASC",
+        created_at=_iso_timestamp("q.created_at"),
+        updated_at=_iso_timestamp("q.updated_at"),
+        question_table=Question._meta.db_table,
+        domain_table=Domain._meta.db_table,
+        topic_table=Topic._meta.db_table,
+        user_table=CustomUser._meta.db_table,
+    )
+
+    with connections[page_qs.db].cursor() as cursor:
+        cursor.execute(sql, (*params, paginator.page_size))
+        results, created, ids = cursor.fetchone()
+
+    paginator.build_page(list(zip(created, ids)), get_keys=list)
+    return b"".join(
+        [
+            b'{"next":',
+            json.dumps(paginator.get_next_link()).encode(),
+            b',"previous":',
+            json.dumps(paginator.get_previous_link()).encode(),
+            b',"results":',
+            results.encode(),
+            b"}",
+        ]
+    )
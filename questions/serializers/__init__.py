@@ -13,6 +13,13 @@ from .payloadSerializers import (
     DiagramPayloadSerializer,
 )
 from .questionSerializers import QuestionSerializer, QuestionListSerializer
+from .importSerializers import (
+    QuestionImportSerializer,
+    DiagramImportPayloadSerializer,
+    QuestionImportReportSerializer,
+)
+from .paperSerializers import PaperRequestSerializer, PaperSerializer
+from .gradingSerializers import GradeRequestSerializer, GradeReportSerializer
 
 # Define __all__ for explicit exports if desired, which helps with tools like 'from .serializers import *'
 __all__ = [
@@ -26,4 +33,11 @@ __all__ = [
     "DiagramPayloadSerializer",
     "QuestionSerializer",
     "QuestionListSerializer",
+    "QuestionImportSerializer",
+    "DiagramImportPayloadSerializer",
+    "QuestionImportReportSerializer",
+    "PaperRequestSerializer",
+    "PaperSerializer",
+    "GradeRequestSerializer",
+    "GradeReportSerializer",
 ]
@@ -0,0 +1,39 @@
+from rest_framework import serializers
+
+
+class SubmissionSerializer(serializers.Serializer):
+    candidate = serializers.CharField(max_length=255)
+    # Answers are checked while grading; malformed ones simply score zero
+    answers = serializers.DictField(
+        help_text="Question id -> list of option ids (mcq) or number (num)"
+    )
+
+
+class GradeRequestSerializer(serializers.Serializer):
+    questions = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=500
+    )
+    submissions = SubmissionSerializer(many=True, max_length=20000)
+
+    def validate_questions(self, questions):
+        if len(set(questions)) != len(questions):
+            raise serializers.ValidationError("Questions must be unique.")
+        return questions
+
+
+class CandidateResultSerializer(serializers.Serializer):
+    candidate = serializers.CharField()
+    score = serializers.IntegerField()
+    correct = serializers.IntegerField()
+
+
+class QuestionResultSerializer(serializers.Serializer):
+    question = serializers.UUIDField()
+    correct_rate = serializers.FloatField()
+
+
+class GradeReportSerializer(serializers.Serializer):
+    max_score = serializers.IntegerField()
+    ungraded = serializers.ListField(child=serializers.UUIDField())
+    results = CandidateResultSerializer(many=True)
+    questions = QuestionResultSerializer(many=True)
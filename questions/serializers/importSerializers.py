@@ -0,0 +1,47 @@
+from rest_framework import serializers
+import questions.models.models as models
+
+
+class QuestionImportSerializer(serializers.ModelSerializer):
+    """
+    Validates the question part of one bulk-import row without touching the
+    database. `domain`/`topic` are references (slug or id) resolved per chunk
+    by the importer, and `id` may be supplied so exports round-trip.
+    """
+
+    id = serializers.UUIDField(required=False)
+    domain = serializers.CharField()
+    topic = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    payload = serializers.JSONField()
+
+    class Meta:
+        model = models.Question
+        fields = [
+            "id",
+            "domain",
+            "topic",
+            "type",
+            "question",
+            "description",
+            "difficulty",
+            "points",
+            "time_estimate_seconds",
+            "is_active",
+            "payload",
+        ]
+
+
+class DiagramImportPayloadSerializer(serializers.Serializer):
+    # Imports reference an already stored image by name instead of uploading it
+    image = serializers.CharField(max_length=100)
+    hotspots = serializers.JSONField(required=False, default=list)
+
+
+class QuestionImportErrorSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+class QuestionImportReportSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    errors = QuestionImportErrorSerializer(many=True)
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+import questions.models.models as models
+from .questionSerializers import QuestionListSerializer
+
+
+class PaperSectionSerializer(serializers.Serializer):
+    domain = serializers.SlugField()
+    topic = serializers.SlugField(required=False, allow_null=True)
+    type = serializers.ChoiceField(choices=models.Question.QUESTION_TYPES, required=False, allow_null=True)
+    count = serializers.IntegerField(min_value=1, max_value=500)
+
+
+class PaperRequestSerializer(serializers.Serializer):
+    sections = PaperSectionSerializer(many=True, allow_empty=False)
+    difficulty = serializers.DictField(
+        child=serializers.FloatField(min_value=0),
+        required=False,
+        help_text='Weights per difficulty level, e.g. {"1": 0.2, "3": 0.5, "5": 0.3}',
+    )
+    max_points = serializers.IntegerField(min_value=0, required=False)
+    max_time_seconds = serializers.IntegerField(min_value=0, required=False)
+    seed = serializers.IntegerField(required=False, help_text="Makes the selection reproducible.")
+
+    def validate_difficulty(self, difficulty):
+        levels = {}
+        for level, weight in difficulty.items():
+            if level not in {"1", "2", "3", "4", "5"}:
+                raise serializers.ValidationError(f"Unknown difficulty level '{level}'.")
+            levels[int(level)] = weight
+        if levels and not any(levels.values()):
+            raise serializers.ValidationError("At least one weight must be positive.")
+        return levels
+
+
+class PaperSerializer(serializers.Serializer):
+    questions = QuestionListSerializer(many=True)
+    total_points = serializers.IntegerField()
+    total_time_seconds = serializers.IntegerField()
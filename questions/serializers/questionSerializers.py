@@ -1,6 +1,7 @@
 from users.models import CustomUser
 import questions.models.models as models
 import questions.models.models_payload as payload_models
+from questions.answer_keys import invalidate_answer_key
 from rest_framework import serializers  # noqa
 from . import DomainNameIdSerializer, TopicNameIdSlugSerializer  # noqa
 from . import (
@@ -192,9 +193,13 @@ class QuestionSerializer(serializers.ModelSerializer):
                     pass
 
         # Update basic fields
+        type_changed = new_type != instance.type
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
+        if type_changed:
+            # The cached answer key was compiled for the old type
+            invalidate_answer_key(instance.pk)
 
         # Upsert the new payload if provided and matches the question's type
         payload_model_class, payload_data = payload_map.get(new_type, (None, None))
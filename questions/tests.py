@@ -1,3 +1,1122 @@
-from django.test import TestCase
+import copy
+import datetime
+import json
+import re
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.db import OperationalError, connection, connections, transaction
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend import health
+from backend.middleware import install_query_timer
+from backend.versions import get_version
+from backend.router import STICKY_COOKIE, STICKY_HEADER, ReplicaRouter, choose_replica
+from users.models import CustomUser
+from .models import CasePayload, Domain, MCQPayload, NumericalPayload, Question, Topic
+from .answer_keys import AnswerKeyCache, MCQKey, NumericalKey, answer_keys, invalidate_answer_key
+from .filters import TrigramSearchFilter
+from .bulk import QuestionImporter, export_queryset, export_rows, read_rows, write_rows
+from .grading import grade_batch
+from .pagination import QuestionCursorPagination
+from .payloads import attach_payloads
+from .papers import PaperError, QuestionIndex, check_paper, generate_paper, question_index
+from .pg_json import render_question_page
+from .serializers import QuestionListSerializer, QuestionSerializer
+
+
+# Requests are only timed where a test asks for it (RequestTimingTests), so
+# the sampled JSON log lines stay out of the test output
+_no_request_timing = override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+
+
+def setUpModule():
+    _no_request_timing.enable()
+
+
+def tearDownModule():
+    _no_request_timing.disable()
+
+
+class QuestionListJsonParityTests(TestCase):
+    """The PostgreSQL JSON engine must render exactly what QuestionListSerializer does."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(
+            email="author@example.com", first_name="Ada", last_name="Byron"
+        )
+        domain = Domain.objects.create(name="Chemical")
+        topic = Topic.objects.create(domain=domain, name="Fluid Mechanics")
+
+        Question.objects.create(
+            domain=domain,
+            topic=topic,
+            type="num",
+            question='Find $$\\dot{m}$$ for "water" \\ ünïcode',
+            description="Use continuity.",
+            difficulty=3,
+            points=2,
+            created_by=author,
+        )
+        Question.objects.create(domain=domain, type="mcq", question="No topic, no author")
+        whole_second = Question.objects.create(domain=domain, type="case", question="Round")
+        Question.objects.filter(pk=whole_second.pk).update(
+            created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+
+    def queryset(self):
+        return Question.objects.select_related("domain", "topic", "created_by")
+
+    def request(self, url="/api/v1/questions/", **params):
+        return Request(APIRequestFactory().get(url, params))
+
+    def serializer_page(self, request):
+        paginator = QuestionCursorPagination()
+        page = paginator.paginate_queryset(self.queryset(), request)
+        data = QuestionListSerializer(page, many=True).data
+        rendered = JSONRenderer().render(paginator.get_paginated_response(data).data)
+        return json.loads(rendered)
+
+    def postgres_page(self, request):
+        paginator = QuestionCursorPagination()
+        return json.loads(render_question_page(self.queryset(), paginator, request))
+
+    def test_full_page_matches_serializer(self):
+        request = self.request()
+        self.assertEqual(self.postgres_page(request), self.serializer_page(request))
+
+    def test_cursor_pages_match_serializer(self):
+        first = self.serializer_page(self.request(page_size=1))
+        self.assertEqual(self.postgres_page(self.request(page_size=1)), first)
+
+        second_request = self.request(first["next"])
+        second = self.serializer_page(second_request)
+        self.assertEqual(self.postgres_page(second_request), second)
+
+        back_request = self.request(second["previous"])
+        self.assertEqual(self.postgres_page(back_request), self.serializer_page(back_request))
+
+
+class KeysetCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = Domain.objects.create(name="Chemical")
+        for i in range(5):
+            Question.objects.create(domain=domain, type="mcq", question=f"q{i}")
+        # Every row shares created_at: the id tie-breaker alone orders them
+        Question.objects.update(created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        cls.ids = list(Question.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def page(self, url="/api/v1/questions/", **params):
+        paginator = QuestionCursorPagination()
+        rows = paginator.paginate_queryset(Question.objects.all(), Request(APIRequestFactory().get(url, params)))
+        return [row.id for row in rows], paginator.get_next_link(), paginator.get_previous_link()
+
+    def test_next_cursors_walk_ties_without_gaps(self):
+        seen, (ids, next_link, previous_link) = [], self.page(page_size=2)
+        self.assertIsNone(previous_link)
+        seen += ids
+        while next_link:
+            ids, next_link, previous_link = self.page(next_link)
+            self.assertIsNotNone(previous_link)
+            seen += ids
+        self.assertEqual(seen, self.ids)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        first, next_link, _ = self.page(page_size=2)
+        second, next_link, _ = self.page(next_link)
+        third, _, previous_link = self.page(next_link)
+        self.assertEqual(third, self.ids[4:])
+        back, _, back_previous = self.page(previous_link)
+        self.assertEqual(back, second)
+        self.assertEqual(self.page(back_previous)[0], first)
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ("not-base64!", "eyJrIjogWzFdfQ==", "eyJrIjogWyJ4IiwgIngiXX0="):
+            with self.assertRaises(NotFound):
+                self.page(cursor=cursor)
+
+
+class QuestionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="search@example.com", first_name="Se", last_name="Arch", role="manager"
+        )
+        domain = Domain.objects.create(name="Chemical")
+
+        def create(question, description=""):
+            return Question.objects.create(domain=domain, type="mcq", question=question, description=description)
+
+        cls.in_question = create("Entropy change of an ideal gas", "Closed system")
+        cls.in_description = create("Heat engine efficiency", "Uses entropy balance")
+        cls.twice = create("Entropy and entropy generation", "Second law entropy")
+        cls.latex = create(r"Evaluate $$\frac{dQ}{T}$$ for a reversible cycle")
+        create("Pump sizing")
+        cls.ties = [create(f"Reactor design {i}") for i in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def search(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [uuid.UUID(row["id"]) for row in body["results"]], body["next"]
+
+    def test_search_vector_is_never_selected(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.search("/api/v1/questions/")
+            self.search("/api/v1/questions/?q=entropy")
+            list(export_rows(export_queryset()))
+            self.client.get(f"/api/v1/questions/{self.latex.pk}/")
+        # The column itself, not the ts_rank() computed from it for ordering
+        column = re.compile(r'(SELECT |, )"questions_question"\."search_vector"(, |$)')
+        selected = [query["sql"].split(" FROM ")[0] for query in queries if "questions_question" in query["sql"]]
+        self.assertTrue(selected)
+        self.assertFalse([columns for columns in selected if column.search(columns)])
+
+    def test_results_are_ranked_by_relevance(self):
+        ids, _ = self.search("/api/v1/questions/?q=entropy")
+        # Repeated terms rank higher, and question text (weight A) above description (weight B)
+        self.assertEqual(ids, [self.twice.id, self.in_question.id, self.in_description.id])
+
+    def test_latex_markup_is_not_indexed(self):
+        self.assertEqual(self.search("/api/v1/questions/?q=frac")[0], [])
+        self.assertEqual(self.search("/api/v1/questions/?q=dQ")[0], [self.latex.id])
+
+    def test_cursor_pages_through_equal_ranks(self):
+        # Equal ranks fall back to (-created_at, -id), which must survive the cursor round trip
+        expected = list(
+            Question.objects.filter(question__startswith="Reactor").order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        seen, (ids, next_link) = [], self.search("/api/v1/questions/?q=reactor&page_size=2")
+        seen += ids
+        while next_link:
+            ids, next_link = self.search(next_link)
+            seen += ids
+        self.assertEqual(seen, expected)
+
+    def test_cursor_pages_through_distinct_ranks(self):
+        seen, (ids, next_link) = [], self.search("/api/v1/questions/?q=entropy&page_size=1")
+        seen += ids
+        while next_link:
+            ids, next_link = self.search(next_link)
+            seen += ids
+        self.assertEqual(seen, [self.twice.id, self.in_question.id, self.in_description.id])
+
+
+class PayloadQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="payloads@example.com", first_name="Pay", last_name="Load", role="manager"
+        )
+        domain = Domain.objects.create(name="Chemical")
+        topic = Topic.objects.create(domain=domain, name="Thermodynamics")
+        options = [str(uuid.uuid4()) for _ in range(4)]
+        cls.questions = []
+        for i in range(10):
+            if i % 2:
+                question = Question.objects.create(
+                    domain=domain, topic=topic, type="num", question=f"n{i}", created_by=cls.manager
+                )
+                NumericalPayload.objects.create(question=question, answer=i, tolerance=0.1)
+            else:
+                question = Question.objects.create(domain=domain, type="mcq", question=f"m{i}")
+                MCQPayload.objects.create(
+                    question=question, options={option: option for option in options}, correct=options[:1]
+                )
+            cls.questions.append(question)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        # Warm the role permission map
+        self.client.get("/api/v1/questions/?page_size=1")
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(path).status_code, 200)
+        return len(queries)
+
+    def test_list_with_payloads_does_not_grow_with_page_size(self):
+        small = self.count_queries("/api/v1/questions/?include=payload&page_size=2")
+        large = self.count_queries("/api/v1/questions/?include=payload&page_size=10")
+        self.assertEqual(small, large)
+
+    def test_retrieve_costs_the_same_for_every_type(self):
+        mcq = self.count_queries(f"/api/v1/questions/{self.questions[0].pk}/")
+        num = self.count_queries(f"/api/v1/questions/{self.questions[1].pk}/")
+        self.assertEqual(mcq, num)
+
+
+class TrigramSearchFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="trigram@example.com", first_name="Tri", last_name="Gram", role="manager"
+        )
+        for name in ("Thermodynamics", "Fluid Mechanics", "Fluid Flow Measurement", "Chemical Engineering"):
+            Domain.objects.create(name=name)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def search(self, term):
+        response = self.client.get("/api/v1/questions/domains/", {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.json()]
+
+    def test_typos_still_match(self):
+        self.assertEqual(self.search("thermodynamcs"), ["Thermodynamics"])
+        self.assertEqual(self.search("chemcal engineering"), ["Chemical Engineering"])
+
+    def test_results_are_ordered_by_similarity(self):
+        self.assertEqual(self.search("fluid mechanic"), ["Fluid Mechanics", "Fluid Flow Measurement"])
+
+    def test_short_prefix_matches_by_ilike(self):
+        self.assertEqual(self.search("fl"), ["Fluid Flow Measurement", "Fluid Mechanics"])
+
+    def test_threshold_setting(self):
+        with override_settings(TRIGRAM_SIMILARITY_THRESHOLD=0.9):
+            self.assertEqual(self.search("thermodynamcs"), [])
+        cache.clear()
+        self.assertEqual(self.search("thermodynamcs"), ["Thermodynamics"])
+
+    def test_search_uses_the_trigram_index(self):
+        for term in ("thermodynamcs", "fl"):
+            queryset = TrigramSearchFilter.search(Domain.objects.filter(is_active=True), ["name"], term)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = queryset.explain()
+            self.assertIn("domain_name_trgm_idx", plan, term)
+            self.assertNotIn("Seq Scan", plan, term)
+
+
+@override_settings(SHARED_VERSION_POLL_SECONDS=60)
+class TaxonomyCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="taxonomy@example.com", first_name="Tax", last_name="Onomy", role="manager"
+        )
+        cls.domain = Domain.objects.create(name="Chemical")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def names(self):
+        response = self.client.get("/api/v1/questions/domains/")
+        self.assertEqual(response.status_code, 200)
+        return [domain["name"] for domain in response.json()]
+
+    def test_repeated_list_is_served_from_cache(self):
+        self.assertEqual(self.names(), ["Chemical"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ["Chemical"])
+
+    def test_save_and_delete_invalidate(self):
+        self.names()
+        self.domain.name = "Process"
+        self.domain.save()
+        self.assertEqual(self.names(), ["Process"])
+        self.domain.delete()
+        self.assertEqual(self.names(), [])
+
+    def test_bump_from_another_worker_is_seen(self):
+        self.names()
+        # Another process renamed it: its bump only reaches the shared cache
+        Domain.objects.filter(pk=self.domain.pk).update(name="Process")
+        caches["shared"].set("versions:taxonomy", "bumped-elsewhere", timeout=None)
+        self.assertEqual(self.names(), ["Chemical"])
+        with override_settings(SHARED_VERSION_POLL_SECONDS=0):
+            self.assertEqual(self.names(), ["Process"])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="conditional@example.com", first_name="Con", last_name="Ditional", role="manager"
+        )
+        cls.domain = Domain.objects.create(name="Chemical")
+        cls.questions = [
+            Question.objects.create(domain=cls.domain, type="num", question=f"q{i}", created_by=cls.manager)
+            for i in range(3)
+        ]
+        cls.payload = NumericalPayload.objects.create(question=cls.questions[0], answer=1, tolerance=0.1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def get(self, path, **headers):
+        return self.client.get(path, headers=headers)
+
+    def assert_changes(self, path, change):
+        etag = self.get(path)["ETag"]
+        self.assertEqual(self.get(path, **{"If-None-Match": etag}).status_code, 304)
+        change()
+        response = self.get(path, **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_and_detail_answer_304(self):
+        for path in ("/api/v1/questions/", f"/api/v1/questions/{self.questions[0].pk}/"):
+            etag = self.get(path)["ETag"]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.get(path, **{"If-None-Match": etag}).status_code, 304)
+            self.assertLessEqual(len(queries), 2)
+
+    def test_list_validator_is_bounded_by_the_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get("/api/v1/questions/?page_size=2")
+        self.assertIn("LIMIT 3", queries[0]["sql"])
+        self.assertNotIn("COUNT(", " ".join(query["sql"] for query in queries))
+
+    def test_list_has_no_last_modified(self):
+        response = self.get("/api/v1/questions/")
+        self.assertNotIn("Last-Modified", response)
+        since = {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+        self.assertEqual(self.get("/api/v1/questions/", **since).status_code, 200)
+
+    def test_delete_and_deactivation_change_the_list(self):
+        self.assert_changes("/api/v1/questions/", lambda: self.questions[2].delete())
+        question = self.questions[1]
+        question.is_active = False
+        self.assert_changes("/api/v1/questions/", question.save)
+
+    def test_rename_and_payload_edit_change_the_list(self):
+        self.domain.name = "Process"
+        self.assert_changes("/api/v1/questions/", self.domain.save)
+        self.manager.email = "renamed@example.com"
+        self.assert_changes("/api/v1/questions/", self.manager.save)
+        self.payload.answer = 2
+        self.assert_changes("/api/v1/questions/?include=payload", self.payload.save)
+
+
+class QuestionImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = Domain.objects.create(name="Chemical")
+        Topic.objects.create(domain=domain, name="Fluid Mechanics")
+
+    def test_valid_rows_are_created_and_invalid_rows_reported(self):
+        options = {str(uuid.uuid4()): text for text in "ABCD"}
+        rows = [
+            {
+                "domain": "chemical",
+                "topic": "fluid-mechanics",
+                "type": "mcq",
+                "question": "Pick A",
+                "payload": {"options": options, "correct": [next(iter(options))]},
+            },
+            {"domain": "chemical", "type": "num", "question": "2+2", "payload": {"answer": 4}},
+            {"domain": "missing", "type": "num", "question": "?", "payload": {"answer": 1}},
+            {"domain": "chemical", "type": "num", "question": "?", "payload": {}},
+        ]
+        lines = [json.dumps(row).encode() for row in rows] + [b"{oops"]
+
+        report = QuestionImporter(chunk_size=2).run(read_rows(lines, "ndjson"))
+
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4, 5])
+        mcq = Question.objects.select_related("mcq_payload", "topic").get(question="Pick A")
+        self.assertEqual(mcq.topic.slug, "fluid-mechanics")
+        self.assertEqual(mcq.mcq_payload.options, options)
+        self.assertEqual(Question.objects.get(question="2+2").num_payload.answer, 4)
+
+    def test_export_round_trips_through_import(self):
+        domain = Domain.objects.get(slug="chemical")
+        case = Question.objects.create(domain=domain, type="case", question="Essay", points=3)
+        CasePayload.objects.create(question=case, rubric={"criteria": "Clarity", "max": 5})
+        num = Question.objects.create(domain=domain, type="num", question="2+2", is_active=False)
+        NumericalPayload.objects.create(question=num, answer=4, unit="m")
+
+        for fmt in ("ndjson", "csv"):
+            with self.subTest(fmt=fmt):
+                exported = list(write_rows(export_rows(export_queryset()), fmt))
+                rows = list(export_rows(export_queryset()))
+                Question.objects.all().delete()
+
+                lines = [line.encode() for line in exported]
+                report = QuestionImporter().run(read_rows(lines, fmt))
+
+                self.assertEqual(report, {"created": 2, "errors": []})
+                self.assertEqual(list(export_rows(export_queryset())), rows)
+
+
+class PaperGenerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = Domain.objects.create(name="Chemical")
+        topic = Topic.objects.create(domain=domain, name="Thermodynamics")
+        Question.objects.bulk_create(
+            Question(
+                domain=domain,
+                topic=topic if i % 2 else None,
+                type="num",
+                question=f"Q{i}",
+                difficulty=1 + i % 5,
+                points=1 + i % 3,
+                time_estimate_seconds=60 * (1 + i % 4),
+            )
+            for i in range(60)
+        )
+        Question.objects.create(domain=domain, type="num", question="Retired", is_active=False)
+
+    def setUp(self):
+        self.index = QuestionIndex(ttl=60)
+
+    def test_sections_distribution_and_budgets(self):
+        picks = generate_paper(
+            sections=[
+                {"domain": "chemical", "count": 6},
+                {"domain": "chemical", "topic": "thermodynamics", "count": 4},
+            ],
+            difficulty={1: 1, 5: 1},
+            max_points=14,
+            max_time_seconds=1500,
+            seed=1,
+            index=self.index,
+        )
+        found = Question.objects.in_bulk([pick.id for pick in picks])
+        questions = [found[pick.id] for pick in picks]
+
+        self.assertEqual(len(found), 10)
+        self.assertEqual(sorted(q.difficulty for q in questions), [1] * 5 + [5] * 5)
+        self.assertTrue(all(q.topic_id is not None for q in questions[6:]))
+        self.assertLessEqual(sum(q.points for q in questions), 14)
+        self.assertLessEqual(sum(q.time_estimate_seconds for q in questions), 1500)
+        self.assertTrue(all(q.is_active for q in questions))
+
+    def test_seed_is_reproducible(self):
+        sections = [{"domain": "chemical", "count": 5}]
+        first = generate_paper(sections, seed=3, index=self.index)
+        self.assertEqual(generate_paper(sections, seed=3, index=self.index), first)
+
+    def test_unsatisfiable_constraints(self):
+        with self.assertRaises(PaperError):
+            generate_paper([{"domain": "chemical", "count": 61}], index=self.index)
+        with self.assertRaises(PaperError):
+            generate_paper([{"domain": "chemical", "count": 10}], max_points=9, index=self.index)
+
+    def test_check_paper_uses_the_loaded_rows(self):
+        sections = [{"domain": "chemical", "topic": "thermodynamics", "count": 4}]
+        picks = generate_paper(sections, difficulty={1: 1}, max_points=12, seed=2, index=self.index)
+        found = Question.objects.select_related("domain", "topic").in_bulk([pick.id for pick in picks])
+        questions = [found[pick.id] for pick in picks]
+        check_paper(questions, sections, difficulty={1: 1}, max_points=12)
+
+        questions[0].difficulty = 2
+        with self.assertRaisesMessage(PaperError, "difficulty distribution"):
+            check_paper(questions, sections, difficulty={1: 1})
+        questions[0].topic = None
+        with self.assertRaisesMessage(PaperError, "no longer belongs"):
+            check_paper(questions, sections)
+        with self.assertRaisesMessage(PaperError, "points budget"):
+            check_paper(questions[:4], [{"domain": "chemical", "count": 4}], max_points=3)
+        with self.assertRaisesMessage(PaperError, "still available"):
+            check_paper(questions[:3], sections)
+
+
+class PaperEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="papers@example.com", first_name="Pa", last_name="Per", role="manager"
+        )
+        domain = Domain.objects.create(name="Chemical")
+        Question.objects.bulk_create(
+            Question(domain=domain, type="num", question=f"Q{i}", points=1, time_estimate_seconds=60)
+            for i in range(10)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        question_index.refresh()
+        self.addCleanup(question_index.invalidate)
+
+    def generate(self, **constraints):
+        data = {"sections": [{"domain": "chemical", "count": 4}], "max_points": 4, **constraints}
+        return self.client.post("/api/v1/questions/generate-paper/", data, format="json")
+
+    def test_stale_index_is_rebuilt_and_budgets_hold(self):
+        # Half the bank became more expensive after the index was built
+        Question.objects.filter(question__in=[f"Q{i}" for i in range(5)]).update(points=3)
+        response = self.generate(seed=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["questions"]), 4)
+        self.assertEqual(response.data["total_points"], 4)
+
+    def test_budget_broken_after_the_index_was_built_is_an_error(self):
+        Question.objects.update(points=3)
+        with mock.patch.object(question_index, "invalidate"):
+            response = self.generate()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("points budget", response.data["message"])
+
+    def test_short_paper_after_the_retry_is_an_error(self):
+        Question.objects.update(is_active=False)
+        with mock.patch.object(question_index, "invalidate"):
+            response = self.generate()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("still available", response.data["message"])
+
+
+class GradingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = Domain.objects.create(name="Chemical")
+        cls.options = [str(uuid.uuid4()) for _ in range(4)]
+        cls.mcq = Question.objects.create(domain=domain, type="mcq", question="Pick", points=2)
+        MCQPayload.objects.create(
+            question=cls.mcq,
+            options={option: f"Option {i}" for i, option in enumerate(cls.options)},
+            correct=cls.options[:2],
+        )
+        cls.num = Question.objects.create(domain=domain, type="num", question="g?", points=3)
+        NumericalPayload.objects.create(question=cls.num, answer=9.81, tolerance=0.02)
+        cls.zero = Question.objects.create(domain=domain, type="num", question="0?")
+        NumericalPayload.objects.create(question=cls.zero, answer=0, tolerance=0.01)
+        cls.case = Question.objects.create(domain=domain, type="case", question="Essay")
+
+    def test_batch_scores(self):
+        mcq, num, zero = str(self.mcq.id), str(self.num.id), str(self.zero.id)
+        submissions = [
+            {"candidate": "all", "answers": {mcq: self.options[1::-1], num: 9.9, zero: 0.005}},
+            {"candidate": "subset", "answers": {mcq: self.options[:1], num: "9.7"}},
+            {"candidate": "superset", "answers": {mcq: self.options[:3], num: 10.1}},
+            {"candidate": "junk", "answers": {mcq: ["nope"], num: "ten", zero: [1]}},
+            {"candidate": "empty", "answers": {}},
+        ]
+
+        report = grade_batch([self.mcq.id, self.num.id, self.zero.id, self.case.id], submissions)
+
+        self.assertEqual(report["max_score"], 6)
+        self.assertEqual(report["ungraded"], [self.case.id])
+        self.assertEqual(
+            [(r["candidate"], r["score"], r["correct"]) for r in report["results"]],
+            [("all", 6, 3), ("subset", 3, 1), ("superset", 0, 0), ("junk", 0, 0), ("empty", 0, 0)],
+        )
+        self.assertEqual(
+            [q["correct_rate"] for q in report["questions"]], [0.2, 0.4, 0.2]
+        )
+
+
+@override_settings(SHARED_VERSION_POLL_SECONDS=60)
+class AnswerKeyCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = Domain.objects.create(name="Chemical")
+        cls.num = Question.objects.create(domain=domain, type="num", question="g?")
+        NumericalPayload.objects.create(question=cls.num, answer=9.81, tolerance=0.02, unit="m/s2")
+
+    def setUp(self):
+        answer_keys.clear()
+        get_version("answer_keys")
+
+    def test_hits_after_first_load(self):
+        with self.assertNumQueries(2):  # question + the numerical payload table
+            self.assertEqual(
+                answer_keys.get_many({self.num.id: "num"}),
+                {self.num.id: NumericalKey(9.81, 0.02, "m/s2")},
+            )
+        with self.assertNumQueries(0):
+            answer_keys.get_many({self.num.id: "num"})
+        self.assertEqual(answer_keys.stats()["hits"], 1)
+        self.assertEqual(answer_keys.stats()["misses"], 1)
+
+    def test_payload_write_invalidates(self):
+        answer_keys.get_many({self.num.id: "num"})
+        NumericalPayload.objects.update_or_create(question=self.num, defaults={"answer": 1.5})
+        self.assertEqual(answer_keys.get_many({self.num.id: "num"})[self.num.id].answer, 1.5)
+
+    def test_type_change_invalidates(self):
+        answer_keys.get_many({self.num.id: "num"})
+        options = {str(uuid.uuid4()): text for text in "ABCD"}
+        correct = [next(iter(options))]
+        serializer = QuestionSerializer(
+            self.num,
+            data={"type": "mcq", "mcq_payload": {"options": options, "correct": correct}},
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertEqual(answer_keys.stats()["size"], 0)
+        key = answer_keys.get_many({self.num.id: "mcq"})[self.num.id]
+        self.assertEqual(key, MCQKey(tuple(sorted(options)), frozenset(correct)))
+
+    def test_write_in_another_worker_invalidates(self):
+        answer_keys.get_many({self.num.id: "num"})
+        # Neither the signals nor the in-process invalidation run here
+        NumericalPayload.objects.filter(question=self.num).update(answer=1.5)
+        caches["shared"].set("versions:answer_keys", "bumped-elsewhere", timeout=None)
+        self.assertEqual(answer_keys.get_many({self.num.id: "num"})[self.num.id].answer, 9.81)
+        with override_settings(SHARED_VERSION_POLL_SECONDS=0):
+            self.assertEqual(answer_keys.get_many({self.num.id: "num"})[self.num.id].answer, 1.5)
+
+    def test_reader_racing_a_writer_does_not_cache(self):
+        def load_then_commit_write(questions):
+            attach_payloads(questions)
+            invalidate_answer_key(self.num.id)
+
+        with mock.patch("questions.answer_keys.attach_payloads", side_effect=load_then_commit_write):
+            self.assertEqual(answer_keys.get_many({self.num.id: "num"})[self.num.id].answer, 9.81)
+        self.assertEqual(answer_keys.stats()["size"], 0)
+
+    def test_lru_bound(self):
+        cache = AnswerKeyCache(maxsize=1)
+        other = Question.objects.create(domain=self.num.domain, type="case", question="Essay")
+        cache.get_many({self.num.id: "num", other.id: "case"})
+        self.assertEqual(cache.stats()["size"], 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class AsyncReadEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="async@example.com", first_name="As", last_name="Ync", role="manager"
+        )
+        domain = Domain.objects.create(name="Chemical")
+        Topic.objects.create(domain=domain, name="Heat Transfer")
+        cls.num = Question.objects.create(domain=domain, type="num", question="g?")
+        NumericalPayload.objects.create(question=cls.num, answer=9.81, tolerance=0.02, unit="m/s2")
+        Question.objects.create(domain=domain, type="mcq", question="Pick one")
+
+    def headers(self, user=None):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user or self.manager)}"}
+
+    async def compare(self, path):
+        sync_response = await sync_to_async(APIClient().get)(
+            f"/api/v1/{path}", headers=self.headers()
+        )
+        async_response = await AsyncClient().get(f"/api/v1/async/{path}", headers=self.headers())
+        self.assertEqual(async_response.status_code, 200)
+        # Same body; cursor links point at the endpoint that was called
+        body = async_response.content.decode().replace("/api/v1/async/", "/api/v1/")
+        self.assertEqual(json.loads(body), json.loads(sync_response.content))
+        return async_response
+
+    async def test_question_list_matches_sync(self):
+        await self.compare("questions/?page_size=1")
+        await self.compare("questions/?include=payload")
+
+    async def test_question_detail_matches_sync(self):
+        response = await self.compare(f"questions/{self.num.pk}/")
+        self.assertEqual(response.json()["num_payload"]["unit"], "m/s2")
+        cached = await AsyncClient().get(
+            f"/api/v1/async/questions/{self.num.pk}/",
+            headers={**self.headers(), "If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_taxonomy_lists_match_sync(self):
+        await self.compare("questions/domains/")
+        await self.compare("questions/topics/")
+
+    @override_settings(SHARED_VERSION_POLL_SECONDS=0)
+    async def test_versions_read_from_a_cold_cache(self):
+        # No sync request first: every version lookup reads the shared
+        # (database) cache from the async views themselves
+        for path in ("questions/", f"questions/{self.num.pk}/", "questions/domains/", "questions/topics/"):
+            response = await AsyncClient().get(f"/api/v1/async/{path}", headers=self.headers())
+            self.assertEqual(response.status_code, 200, path)
+
+    async def test_anonymous_and_unknown(self):
+        self.assertEqual((await AsyncClient().get("/api/v1/async/questions/")).status_code, 401)
+        missing = await AsyncClient().get(
+            f"/api/v1/async/questions/{uuid.uuid4()}/", headers=self.headers()
+        )
+        self.assertEqual(missing.status_code, 404)
+
+
+@override_settings(HEALTH_CHECK_TIMEOUTS={"database": 1, "storage": 1, "smtp": 0.05})
+class HealthCheckTests(TestCase):
+    def setUp(self):
+        health._cached = None
+        self.addCleanup(setattr, health, "_cached", None)
+        self.calls = []
+
+    def check(self, name, error=None, delay=0):
+        def run():
+            self.calls.append(name)
+            time.sleep(delay)
+            if error is not None:
+                raise error
+        return run
+
+    def probe(self, checks):
+        with mock.patch.dict(health.CHECKS, checks):
+            return self.client.get("/healthz"), self.client.get("/readyz")
+
+    def test_all_checks_pass(self):
+        healthz, readyz = self.probe({})
+        self.assertEqual((healthz.status_code, readyz.status_code), (200, 200))
+        self.assertEqual(healthz.json()["status"], "ok")
+        self.assertEqual(set(healthz.json()["checks"]), {"database", "storage", "smtp"})
+
+    def test_optional_dependency_down_is_degraded_but_ready(self):
+        with self.assertLogs("backend.health", "WARNING"):
+            healthz, readyz = self.probe({"smtp": (self.check("smtp", OSError("refused")), False)})
+        self.assertEqual((healthz.status_code, readyz.status_code), (200, 200))
+        self.assertEqual(readyz.json()["status"], "degraded")
+        self.assertEqual(readyz.json()["checks"]["smtp"]["error"], "OSError")
+
+    def test_critical_dependency_down_is_not_ready(self):
+        with self.assertLogs("backend.health", "WARNING"):
+            healthz, readyz = self.probe({"database": (self.check("database", OperationalError("down")), True)})
+        self.assertEqual((healthz.status_code, readyz.status_code), (200, 503))
+        self.assertEqual(readyz.json()["status"], "unavailable")
+
+    def test_each_dependency_has_its_own_timeout(self):
+        slow = {
+            "smtp": (self.check("smtp", delay=0.3), False),
+            "storage": (self.check("storage", delay=0.1), True),
+        }
+        with self.assertLogs("backend.health", "WARNING"):
+            healthz, readyz = self.probe(slow)
+        checks = readyz.json()["checks"]
+        self.assertEqual(checks["smtp"], {"ok": False, "error": "timeout"})
+        self.assertTrue(checks["storage"]["ok"])
+        self.assertEqual(readyz.status_code, 200)
+
+    def test_results_are_reused_within_the_cache_window(self):
+        self.probe({"storage": (self.check("storage"), True)})
+        self.assertEqual(self.calls, ["storage"])
+        with override_settings(HEALTH_CHECK_CACHE_SECONDS=0):
+            self.probe({"storage": (self.check("storage"), True)})
+        self.assertEqual(self.calls, ["storage", "storage", "storage"])
+
+
+class MetricsEndpointTests(TestCase):
+    def test_prometheus_text(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn("# TYPE db_pool_utilization gauge", response.content.decode())
+
+    def test_other_addresses_need_the_token(self):
+        remote = {"REMOTE_ADDR": "203.0.113.7"}
+        self.assertEqual(self.client.get("/metrics", **remote).status_code, 403)
+        with override_settings(METRICS_TOKEN="scrape-me"):
+            self.assertEqual(self.client.get("/metrics", **remote).status_code, 403)
+            wrong = self.client.get("/metrics", headers={"Authorization": "Bearer nope"}, **remote)
+            self.assertEqual(wrong.status_code, 403)
+            right = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}, **remote)
+            self.assertEqual(right.status_code, 200)
+        with override_settings(METRICS_ALLOWED_IPS=["203.0.113.7"]):
+            self.assertEqual(self.client.get("/metrics", **remote).status_code, 200)
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={"replica1": 3, "replica2": 1})
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="replica@example.com", first_name="Re", last_name="Plica", role="administrator"
+        )
+        cls.domain = Domain.objects.create(name="Chemical")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.manager)}")
+
+    def routed_reads(self, method, path, **kwargs):
+        """(model, alias) of every read; the replicas are stood in for by the primary."""
+        reads = []
+        route = ReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            alias = route(router, model, **hints)
+            reads.append((model._meta.label, alias))
+            return "default"
+
+        with mock.patch("backend.router.choose_replica", return_value="replica1"), mock.patch.object(
+            ReplicaRouter, "db_for_read", autospec=True, side_effect=db_for_read
+        ):
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, reads
+
+    def test_list_reads_go_to_replica_but_auth_stays_on_primary(self):
+        response, reads = self.routed_reads("get", "/api/v1/questions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(("questions.Question", "replica1"), reads)
+        self.assertIn(("users.CustomUser", "default"), reads)
+        self.assertNotIn(("users.CustomUser", "replica1"), reads)
+
+    def test_writes_and_sticky_window_stay_on_primary(self):
+        response, reads = self.routed_reads(
+            "patch", f"/api/v1/questions/domains/{self.domain.pk}/", data={"name": "Process"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(reads and all(alias == "default" for _, alias in reads))
+        until = response[STICKY_HEADER]
+        self.assertEqual(response.cookies[STICKY_COOKIE].value, until)
+
+        # The cookie set by the write keeps the author's next read on the primary
+        response, reads = self.routed_reads("get", "/api/v1/questions/domains/?search=Process")
+        self.assertEqual(response.json()[0]["name"], "Process")
+        self.assertTrue(all(alias == "default" for _, alias in reads))
+
+        # So does the header, for clients without cookies
+        self.client.cookies.clear()
+        _, reads = self.routed_reads("get", "/api/v1/users/", headers={STICKY_HEADER: until})
+        self.assertTrue(all(alias == "default" for _, alias in reads))
+        _, reads = self.routed_reads("get", "/api/v1/users/")
+        self.assertIn(("users.CustomUser", "replica1"), reads)
+
+    def test_failed_read_does_not_leave_routing_on(self):
+        with mock.patch("questions.views.QuestionViewSet.list", side_effect=RuntimeError("boom")), mock.patch(
+            "backend.router.choose_replica", return_value="replica1"
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.get("/api/v1/questions/")
+        _, reads = self.routed_reads("post", "/api/v1/questions/domains/", data={"name": "Mass"})
+        self.assertTrue(all(alias == "default" for _, alias in reads))
+
+    def test_weighted_choice_and_fallback(self):
+        healthy = mock.MagicMock()
+        down = mock.MagicMock()
+        down.ensure_connection.side_effect = OperationalError("connection refused")
+        with mock.patch("backend.router._down_until", {}), mock.patch(
+            "backend.router.connections", {"replica1": healthy, "replica2": healthy}
+        ):
+            picks = [choose_replica() for _ in range(400)]
+            self.assertGreater(picks.count("replica1"), picks.count("replica2") * 2)
+
+        with mock.patch("backend.router._down_until", {}) as down_until, mock.patch(
+            "backend.router.connections", {"replica1": down, "replica2": healthy}
+        ), self.assertLogs("backend.router", "WARNING"):
+            self.assertEqual({choose_replica() for _ in range(20)}, {"replica2"})
+            self.assertIn("replica1", down_until)
+            # A replica marked down is not tried again until it is due
+            self.assertEqual(down.ensure_connection.call_count, 1)
+
+        with mock.patch("backend.router._down_until", {}), mock.patch(
+            "backend.router.connections", {"replica1": down, "replica2": down}
+        ), self.assertLogs("backend.router", "WARNING"):
+            self.assertIsNone(choose_replica())
+
+
+REPLICA_ALIASES = ("replica1", "replica2")
+
+
+@override_settings(DATABASE_REPLICA_WEIGHTS={"replica1": 1, "replica2": 1})
+class MirrorReplicaRoutingTests(TestCase):
+    """
+    Replicas configured as TEST MIRRORs of the test database. Routed reads
+    run on their own connections, which do not see this TestCase's
+    uncommitted rows: an empty result shows a read went to a replica.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Added once the test database exists, so they need no setup of their own
+        for alias in REPLICA_ALIASES:
+            replica = copy.deepcopy(connections["default"].settings_dict)
+            replica["OPTIONS"].pop("pool", None)
+            replica["TEST"]["MIRROR"] = "default"
+            connections.settings[alias] = replica
+        cls.databases = {"default", *REPLICA_ALIASES}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICA_ALIASES:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="mirror@example.com", first_name="Mi", last_name="Rror", role="administrator"
+        )
+        cls.domain = Domain.objects.create(name="Chemical")
+        cls.question = Question.objects.create(domain=cls.domain, type="mcq", question="Mirrored?")
+
+    def setUp(self):
+        cache.clear()
+        down_until = mock.patch("backend.router._down_until", {})
+        self.down_until = down_until.start()
+        self.addCleanup(down_until.stop)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.manager)}")
+
+    def request(self, method, path, **kwargs):
+        """The response and the number of queries each replica ran for it."""
+        with CaptureQueriesContext(connections["replica1"]) as first, CaptureQueriesContext(
+            connections["replica2"]
+        ) as second:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, (len(first), len(second))
+
+    def test_each_request_reads_from_one_replica(self):
+        picks = iter(["replica1", "replica2"] * 3)
+        with mock.patch("backend.router.random.choices", lambda candidates, weights: [next(picks)]):
+            for expected in ([1, 0], [0, 1]) * 3:
+                response, counts = self.request("get", "/api/v1/questions/?include=payload")
+                self.assertEqual((response.status_code, response.json()["results"]), (200, []))
+                # Validators, rows and payloads all ran on the replica picked for the request
+                self.assertEqual([bool(count) for count in counts], [bool(flag) for flag in expected])
+
+    def test_only_list_and_retrieve_use_a_replica(self):
+        response, counts = self.request("get", f"/api/v1/questions/{self.question.pk}/")
+        self.assertEqual(response.status_code, 404)
+        self.assertGreater(sum(counts), 0)
+
+        for method, path in (("get", "/api/v1/questions/export/"), ("get", "/api/v1/questions/answer-key-cache/")):
+            response, counts = self.request(method, path)
+            self.assertEqual((response.status_code, counts), (200, (0, 0)))
+        response, counts = self.request("post", "/api/v1/questions/domains/", data={"name": "Mass"})
+        self.assertEqual((response.status_code, counts), (201, (0, 0)))
+
+    def test_sticky_cookie_or_header_keeps_reads_on_the_primary(self):
+        response, _ = self.request("patch", f"/api/v1/questions/{self.question.pk}/", data={"difficulty": 2}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response, counts = self.request("get", "/api/v1/questions/")
+        self.assertEqual((len(response.json()["results"]), counts), (1, (0, 0)))
+
+        until = self.client.cookies[STICKY_COOKIE].value
+        self.client.cookies.clear()
+        response, counts = self.request("get", "/api/v1/questions/", headers={STICKY_HEADER: until})
+        self.assertEqual((len(response.json()["results"]), counts), (1, (0, 0)))
+        _, counts = self.request("get", "/api/v1/questions/")
+        self.assertGreater(sum(counts), 0)
+
+    def test_replica_down_falls_back(self):
+        down = mock.patch.object(connections["replica1"], "ensure_connection", side_effect=OperationalError("down"))
+        first_pick = mock.patch("backend.router.random.choices", lambda candidates, weights: candidates[:1])
+        with down, first_pick, self.assertLogs("backend.router", "WARNING"), CaptureQueriesContext(connections["replica2"]) as second:
+            for _ in range(4):
+                response = self.client.get("/api/v1/questions/")
+                self.assertEqual(response.json()["results"], [])
+        # Every request went to the other replica; the dead one is skipped until due
+        self.assertGreater(len(second), 0)
+        self.assertIn("replica1", self.down_until)
+
+        # With no replica left the primary serves the read
+        self.down_until["replica2"] = time.monotonic() + 60
+        response, counts = self.request("get", "/api/v1/questions/")
+        self.assertEqual((len(response.json()["results"]), counts), (1, (0, 0)))
+
+    def test_taxonomy_cache_is_filled_from_the_primary(self):
+        response, counts = self.request("get", "/api/v1/questions/domains/")
+        self.assertEqual([row["name"] for row in response.json()], ["Chemical"])
+        self.assertEqual(counts, (0, 0))
+        response, counts = self.request("get", "/api/v1/questions/domains/")
+        self.assertEqual(([row["name"] for row in response.json()], counts), (["Chemical"], (0, 0)))
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_HEADER="all")
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="timing@example.com", first_name="Ti", last_name="Ming", role="manager"
+        )
+        domain = Domain.objects.create(name="Chemical")
+        for i in range(3):
+            question = Question.objects.create(domain=domain, type="num", question=f"q{i}")
+            NumericalPayload.objects.create(question=question, answer=i, tolerance=0.1, unit="m")
+
+    def setUp(self):
+        # The test connection was opened before any handler loaded the
+        # middleware, and AsyncClient loads it in another thread
+        install_query_timer(connection=connection)
+
+    def headers(self, user=None):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user or self.manager)}"}
+
+    @staticmethod
+    def server_timing(response):
+        metrics = {}
+        for metric in response["Server-Timing"].split(", "):
+            name, *params = metric.split(";")
+            metrics[name] = dict(param.split("=", 1) for param in params)
+        return metrics
+
+    def test_header_log_and_view_totals(self):
+        with CaptureQueriesContext(connection) as queries, self.assertLogs("backend.middleware", "INFO") as logs:
+            response = self.client.get("/api/v1/questions/?include=payload", headers=self.headers())
+        self.assertEqual(response.status_code, 200)
+
+        timing = self.server_timing(response)
+        self.assertEqual(timing["db"]["desc"], f'"{len(queries)} queries"')
+        self.assertGreater(float(timing["serialize"]["dur"]), 0)
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["db"]["dur"]))
+
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((line["view"], line["status"], line["queries"]), ("questions-list", 200, len(queries)))
+
+        with self.assertLogs("backend.middleware", "INFO"):
+            metrics = self.client.get("/metrics").content.decode()
+        self.assertIn('http_view_queries_total{view="questions-list"}', metrics)
+
+    @override_settings(REQUEST_TIMING_QUERY_WARNING=0)
+    def test_query_heavy_request_is_a_warning(self):
+        with self.assertLogs("backend.middleware", "WARNING"):
+            self.client.get("/api/v1/questions/", headers=self.headers())
+
+    async def test_async_view_queries_are_counted(self):
+        with self.assertLogs("backend.middleware", "INFO"):
+            response = await AsyncClient().get("/api/v1/async/questions/?include=payload", headers=self.headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.server_timing(response)["db"]["desc"], '"0 queries"')
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get("/api/v1/questions/", headers=self.headers())
+        self.assertNotIn("Server-Timing", response)
+
+    def administrator(self):
+        return CustomUser.objects.create_user(
+            email="timing-admin@example.com", first_name="Ad", last_name="Min", role="administrator"
+        )
+
+    @override_settings(REQUEST_TIMING_HEADER="staff")
+    def test_header_is_only_sent_to_staff(self):
+        administrator = self.administrator()
+        with self.assertLogs("backend.middleware", "INFO") as logs:
+            response = self.client.get("/api/v1/questions/", headers=self.headers())
+        self.assertNotIn("Server-Timing", response)
+        # Still measured: only the header is withheld
+        self.assertEqual(json.loads(logs.records[-1].getMessage())["status"], 200)
+
+        with self.assertLogs("backend.middleware", "INFO"):
+            response = self.client.get("/api/v1/questions/", headers=self.headers(administrator))
+        self.assertIn("total", self.server_timing(response))
+
+    @override_settings(REQUEST_TIMING_HEADER="staff")
+    async def test_async_header_is_only_sent_to_staff(self):
+        with self.assertLogs("backend.middleware", "INFO"):
+            response = await AsyncClient().get("/api/v1/async/questions/", headers=self.headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_TIMING_HEADER="off")
+    def test_header_can_be_turned_off(self):
+        with self.assertLogs("backend.middleware", "INFO"):
+            response = self.client.get("/api/v1/questions/", headers=self.headers(self.administrator()))
+        self.assertNotIn("Server-Timing", response)
@@ -1,46 +1,68 @@
 # questions/views.py
 from typing import Type
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets, permissions, filters
-from .filters import QuestionFilter
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from backend.router import ReplicaReadMixin
+from users.permissions import CustomDjangoModelPermissions
+from .answer_keys import answer_keys
+from .bulk import QuestionImporter, export_queryset, export_rows, read_rows, write_rows
+from .cache import TaxonomyCacheMixin
+from .conditional import (
+    list_validators,
+    not_modified_response,
+    object_validators,
+    set_validators,
+)
+from .filters import QuestionFilter, TrigramSearchFilter
+from .grading import grade_batch
+from .pagination import QuestionCursorPagination
+from .papers import PaperError, check_paper, generate_paper, question_index
+from .payloads import attach_payloads
+from .pg_json import render_question_page
 from .models.models import Domain, Topic, Question  # Keep models for queryset
 from .serializers import (
     DomainSerializer,
     TopicSerializer,
     QuestionSerializer,
     QuestionListSerializer,
+    QuestionImportReportSerializer,
+    PaperRequestSerializer,
+    PaperSerializer,
+    GradeRequestSerializer,
+    GradeReportSerializer,
 )
 
 
-class CustomDjangoModelPermissions(permissions.DjangoModelPermissions):
-    perms_map = {
-        "GET": ["%(app_label)s.view_%(model_name)s"],
-        "OPTIONS": [],
-        "HEAD": [],
-        "POST": ["%(app_label)s.add_%(model_name)s"],
-        "PUT": ["%(app_label)s.change_%(model_name)s"],
-        "PATCH": ["%(app_label)s.change_%(model_name)s"],
-        "DELETE": ["%(app_label)s.delete_%(model_name)s"],
-    }
+class ReadActionPermissions(CustomDjangoModelPermissions):
+    # POST actions that only read the bank (paper generation, grading) need the view permission
+    perms_map = {**CustomDjangoModelPermissions.perms_map, "POST": ["%(app_label)s.view_%(model_name)s"]}
 
 
-class DomainViewSet(viewsets.ModelViewSet):
+class DomainViewSet(ReplicaReadMixin, TaxonomyCacheMixin, viewsets.ModelViewSet):
     queryset = Domain.objects.filter(is_active=True)
     serializer_class = DomainSerializer
     permission_classes = [CustomDjangoModelPermissions]
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ["name"]
 
 
-class TopicViewSet(viewsets.ModelViewSet):
+class TopicViewSet(ReplicaReadMixin, TaxonomyCacheMixin, viewsets.ModelViewSet):
     queryset = Topic.objects.select_related("domain").filter(domain__is_active=True)
     serializer_class = TopicSerializer
     permission_classes = [CustomDjangoModelPermissions]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter]
     filterset_fields = ["domain"]
     search_fields = ["name"]
 
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Question.objects.select_related("domain", "topic", "created_by").filter(
         is_active=True
     )
@@ -49,9 +71,210 @@ class QuestionViewSet(viewsets.ModelViewSet):
 
     # serializer_class = QuestionSerializer # Removed, now dynamically set by get_serializer_class
     def get_serializer_class(self) -> Type[QuestionSerializer | QuestionListSerializer]:  # type: ignore
-        if self.action == "list":
+        if self.action == "list" and not self.include_payload():
             return QuestionListSerializer
         return QuestionSerializer
 
     filter_backends = [DjangoFilterBackend]
     filterset_class = QuestionFilter
+    pagination_class = QuestionCursorPagination
+
+    def include_payload(self) -> bool:
+        # Retrieve always carries the payload, list only on `?include=payload`
+        if self.action == "retrieve":
+            return True
+        include = self.request.query_params.get("include", "")
+        return "payload" in include.split(",")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "include",
+                str,
+                description="Set to `payload` to embed type-specific payloads.",
+            )
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Page keys first; a matching If-None-Match never loads or serializes the rows
+        etag, last_modified = list_validators(request, queryset, self.paginator)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if (
+            settings.QUESTION_LIST_ENGINE == "postgres"
+            and not self.include_payload()
+            # The SQL engine pages on (created_at, id) only, not on search rank
+            and self.paginator.get_ordering(queryset) == self.paginator.ordering
+        ):
+            # Postgres assembles the JSON page; skip model and serializer instantiation
+            body = render_question_page(queryset, self.paginator, request)
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            updated_at = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: pk})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            updated_at = None
+        if updated_at is None:
+            # Unknown id: let get_object() raise the regular 404
+            return super().retrieve(request, *args, **kwargs)
+
+        etag, last_modified = object_validators(request, pk, updated_at)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(
+            super().retrieve(request, *args, **kwargs), etag, last_modified
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.include_payload():
+            attach_payloads(page)
+        return page
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.action == "retrieve":
+            attach_payloads([instance])
+        return instance
+
+    @extend_schema(
+        request={"application/x-ndjson": bytes, "text/csv": bytes},
+        responses={200: QuestionImportReportSerializer},
+        parameters=[OpenApiParameter("chunk_size", int)],
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        Stream an NDJSON (default) or CSV (`Content-Type: text/csv`) body of
+        questions into the bank in chunked bulk inserts. Invalid rows are
+        skipped and reported by row number.
+        """
+        fmt = "csv" if request.content_type.startswith("text/csv") else "ndjson"
+        try:
+            chunk_size = min(int(request.query_params.get("chunk_size", 1000)), 5000)
+        except ValueError:
+            chunk_size = 1000
+
+        # Read the raw body line by line instead of parsing it into request.data
+        importer = QuestionImporter(chunk_size=max(chunk_size, 1), author_id=request.user.pk)
+        report = importer.run(read_rows(request.stream or [], fmt))
+        return Response(report, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        responses={(200, "application/x-ndjson"): bytes, (200, "text/csv"): bytes},
+        parameters=[
+            OpenApiParameter(
+                "export_format", str, enum=["ndjson", "csv"], description="Defaults to `ndjson`."
+            )
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream the whole bank, inactive questions included, in the format
+        accepted by `import`. The domain/topic/type filters narrow it down.
+        """
+        fmt = "csv" if request.query_params.get("export_format") == "csv" else "ndjson"
+        queryset = export_queryset(self.filter_queryset(Question.objects.all()))
+        response = StreamingHttpResponse(
+            write_rows(export_rows(queryset), fmt),
+            content_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        )
+        response["Content-Disposition"] = f'attachment; filename="questions.{fmt}"'
+        return response
+
+    @extend_schema(request=PaperRequestSerializer, responses={200: PaperSerializer})
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="generate-paper",
+        permission_classes=[ReadActionPermissions],
+    )
+    def generate_paper(self, request):
+        """
+        Assemble a random paper from per-section counts, an optional
+        difficulty distribution and points/time budgets. Selection runs on
+        the in-memory question index; only the chosen rows are loaded.
+        """
+        serializer = PaperRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        constraints = serializer.validated_data
+        questions = self._draw_paper(constraints)
+        try:
+            check_paper(questions, **constraints)
+        except PaperError:
+            # The index predates an edit, delete or deactivation: rebuild it and draw again
+            question_index.invalidate()
+            questions = self._draw_paper(constraints)
+            try:
+                check_paper(questions, **constraints)
+            except PaperError as e:
+                raise ValidationError({"message": str(e)})
+
+        paper = {
+            "questions": questions,
+            "total_points": sum(question.points for question in questions),
+            "total_time_seconds": sum(question.time_estimate_seconds for question in questions),
+        }
+        return Response(PaperSerializer(paper).data)
+
+    def _draw_paper(self, constraints):
+        try:
+            picks = generate_paper(**constraints)
+        except PaperError as e:
+            raise ValidationError({"message": str(e)})
+        found = (
+            Question.objects.select_related("domain", "topic", "created_by")
+            .filter(is_active=True, domain__is_active=True)
+            .in_bulk([pick.id for pick in picks])
+        )
+        return [found[pick.id] for pick in picks if pick.id in found]
+
+    @extend_schema(request=GradeRequestSerializer, responses={200: GradeReportSerializer})
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="grade",
+        permission_classes=[ReadActionPermissions],
+    )
+    def grade(self, request):
+        """
+        Grade a batch of submissions for a paper in one vectorised pass: MCQ
+        by exact set of options, numerical within the relative tolerance,
+        weighted by points. Case and diagram questions are listed as ungraded.
+        """
+        serializer = GradeRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            report = grade_batch(
+                serializer.validated_data["questions"], serializer.validated_data["submissions"]
+            )
+        except Question.DoesNotExist as e:
+            raise ValidationError({"message": str(e)})
+        return Response(GradeReportSerializer(report).data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="answer-key-cache",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def answer_key_cache(self, request):
+        """Hit/miss counters of this process's compiled answer-key cache."""
+        return Response(answer_keys.stats())
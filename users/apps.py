@@ -1,7 +1,4 @@
 import logging
-import smtplib
-import socket
-from django.conf import settings
 from django.apps import AppConfig
 from django.db.models.signals import post_migrate
 
@@ -54,82 +51,71 @@ all_permissions = {
 }
 
 
+# What each role is allowed to do, as 'app_label.codename'
+ROLE_PERMISSIONS = {
+    "administrator": [
+        *all_permissions["users"].values(),
+        *all_permissions["questions"].values(),
+    ],
+    "manager": [*all_permissions["questions"].values()],
+    "instructor": [],
+    "data_entry": [],  # Usually no API permissions, handled by frontend logic
+}
+
+
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
 
     def ready(self):
-        post_migrate.connect(create_role_groups, sender=self)
-        # Only run this check if the EMAIL_BACKEND is SMTP
-        if settings.EMAIL_BACKEND == "django.core.mail.backends.smtp.EmailBackend":
-            logger.info("Attempting to connect to email server during startup...")
-            try:
-                # Attempt to establish a connection to the SMTP server
-                # Use a timeout to prevent hanging if the server is unreachable
-                with smtplib.SMTP(
-                    settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=5
-                ) as server:
-                    server.noop()  # Send a NOOP command to test the connection
-                logger.info(
-                    f"Successfully connected to email server at {settings.EMAIL_HOST}:{settings.EMAIL_PORT}"
-                )
-            except (
-                smtplib.SMTPConnectError,
-                ConnectionRefusedError,
-                socket.gaierror,  # Catches "Name or service not known"
-                TimeoutError,
-                OSError,
-            ) as e:
-                logger.error(
-                    f"Failed to connect to email server at {settings.EMAIL_HOST}:{settings.EMAIL_PORT}. Error: {e}. Please ensure the email server is running and accessible."
-                )
-            except Exception as e:
-                logger.error(
-                    f"An unexpected error occurred during email server connection check: {e}"
-                )
-        else:
-            logger.info(
-                f"Email backend is not SMTP ({settings.EMAIL_BACKEND}), skipping connection check."
-            )
-
+        from django.contrib.auth.models import Group
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from .authentication import (
+            bump_membership_permission_version,
+            bump_permission_version,
+            bump_user_permission_version,
+        )
+        from .models import CustomUser
+        from .permissions import clear_role_permissions
+        from .roles import clear_role_groups
 
-# Move create_role_groups here, and its imports inside the function
-def create_role_groups(sender, **kwargs):
-    # Imports are moved inside the function to avoid AppRegistryNotReady error
-    from django.contrib.auth.models import Group, Permission
-    from users.models import CustomUser  # Use absolute import for clarity
+        # Not tied to this app: questions creates its permissions after users
+        post_migrate.connect(create_role_groups)
+        # Role -> group id map is per process; any group write drops it
+        post_save.connect(clear_role_groups, sender=Group)
+        post_delete.connect(clear_role_groups, sender=Group)
+        # Shared role -> permission set cache used by CustomDjangoModelPermissions
+        m2m_changed.connect(clear_role_permissions, sender=Group.permissions.through)
+        post_save.connect(clear_role_permissions, sender=Group)
+        post_delete.connect(clear_role_permissions, sender=Group)
+        m2m_changed.connect(clear_role_permissions, sender=CustomUser.groups.through)
+        # Permission versions checked against access token claims
+        m2m_changed.connect(bump_permission_version, sender=Group.permissions.through)
+        post_save.connect(bump_permission_version, sender=Group)
+        post_delete.connect(bump_permission_version, sender=Group)
+        m2m_changed.connect(bump_membership_permission_version, sender=CustomUser.groups.through)
+        m2m_changed.connect(
+            bump_membership_permission_version, sender=CustomUser.user_permissions.through
+        )
+        post_delete.connect(bump_user_permission_version, sender=CustomUser)
+        # Mail server reachability is reported by /healthz and /readyz (backend/health.py)
 
-    # 1. Define what each role is allowed to do
-    # Format: 'app_label.codename'
-    role_permissions = {
-        "administrator": [
-            *all_permissions["users"].values(),
-            *all_permissions["questions"].values(),
-        ],
-        "manager": [*all_permissions["questions"].values()],
-        "instructor": [],
-        "data_entry": [],  # Usually no API permissions, handled by frontend logic
-    }
 
-    for role_value in role_permissions.keys():
-        # Create the Group
-        group, created = Group.objects.get_or_create(name=role_value)
+def create_role_groups(sender=None, using="default", **kwargs):
+    """
+    post_migrate receiver: sync the role groups with ROLE_PERMISSIONS.
 
-        # 2. Assign Permissions for this role
-        if role_value in role_permissions:
-            perms_to_add = []
-            for perm_str in role_permissions[role_value]:
-                app_label, codename = perm_str.split(".")
-                try:
-                    perm = Permission.objects.get(
-                        content_type__app_label=app_label, codename=codename
-                    )
-                    perms_to_add.append(perm)
-                except Permission.DoesNotExist:
-                    # This might happen if 'questions' app isn't migrated yet
-                    print(f"Warning: Permission {perm_str} not found yet.")
+    Permissions of an app are created by its own post_migrate, so this runs
+    after each app that ROLE_PERMISSIONS refers to; permissions still
+    missing on one run are granted by a later one.
+    """
+    from users.roles import sync_role_groups
 
-            if perms_to_add:
-                group.permissions.set(
-                    perms_to_add
-                )  # .set() replaces old perms with this new list
+    if sender is not None and sender.label not in all_permissions:
+        return
+    report = sync_role_groups(ROLE_PERMISSIONS, using=using)
+    if report["added"] or report["removed"] or report["created_groups"]:
+        logger.info(
+            f"Role groups synced: {len(report['created_groups'])} created, "
+            f"{report['added']} permissions granted, {report['removed']} revoked"
+        )
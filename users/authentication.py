@@ -0,0 +1,141 @@
+# users/authentication.py
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.versions import bump_version, get_version
+
+# "pv" claim = "<global version>.<user version>". The global part moves when
+# any role group's permissions change, the user part when that user's role,
+# active flag, groups or direct permissions change. Both are shared versions
+# (backend/versions.py), so a token issued by one worker is current in all
+# of them and a bump made by one is seen by the others.
+PERMISSION_VERSION = "permissions"
+
+
+def _user_version(user_id):
+    return f"{PERMISSION_VERSION}:{user_id}"
+
+
+def get_permission_version(user_id):
+    return f"{get_version(PERMISSION_VERSION)}.{get_version(_user_version(user_id))}"
+
+
+def bump_permission_version(sender=None, **kwargs):
+    """m2m_changed receiver for Group.permissions and post_save/post_delete receiver for Group."""
+    bump_version(PERMISSION_VERSION)
+
+
+def bump_user_permission_versions(user_ids):
+    """Outdate the permission claims of `user_ids`; queryset updates must call this directly."""
+    for user_id in user_ids:
+        bump_version(_user_version(user_id))
+
+
+def bump_user_permission_version(sender, instance, **kwargs):
+    """post_delete receiver for CustomUser."""
+    bump_user_permission_versions([instance.pk])
+
+
+def bump_membership_permission_version(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for CustomUser.groups and CustomUser.user_permissions."""
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bump_user_permission_versions([instance.pk])
+    elif pk_set is None:
+        # group.user_set.clear(): the affected users are not known
+        bump_permission_version()
+    else:
+        bump_user_permission_versions(pk_set)
+
+
+def add_permission_claims(token, user):
+    """
+    Put what CustomDjangoModelPermissions needs into `token`, so
+    ClaimsJWTAuthentication can authorise requests without loading the user.
+    """
+    token["role"] = user.role
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    # Superusers pass every check without looking at their permissions
+    token["perms"] = [] if user.is_superuser else sorted(user.get_all_permissions())
+    token["pv"] = get_permission_version(user.pk)
+    return token
+
+
+class ClaimsUser(TokenUser):
+    """TokenUser whose role and permissions come from the access token claims."""
+
+    @cached_property
+    def id(self):
+        # The claim holds the UUID primary key as a string
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+    @cached_property
+    def role(self):
+        return self.token.get("role")
+
+    @cached_property
+    def perms(self):
+        return frozenset(self.token.get("perms", ()))
+
+    def get_all_permissions(self, obj=None):
+        return set(self.perms)
+
+    def has_perm(self, perm, obj=None):
+        return self.is_superuser or perm in self.perms
+
+    def has_perms(self, perm_list, obj=None):
+        return self.is_superuser or self.perms.issuperset(perm_list)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the permission claims of an access token
+    while its "pv" claim matches the user's current permission version and
+    it is younger than JWT_CLAIMS_MAX_AGE_SECONDS. Any other token (no
+    claims, outdated version, too old) loads the user from the database as
+    JWTAuthentication does, so a deactivated user or a changed role is
+    rejected or re-read on the next request.
+
+    The versions are shared by all workers and re-read at most every
+    SHARED_VERSION_POLL_SECONDS, so a change made by one worker is seen by
+    the others within that window. With the default (database) "shared"
+    cache such a re-read is a query; configure a networked cache such as
+    Redis there to authorise without touching the database.
+    """
+
+    def get_user(self, validated_token):
+        if self._claims_current(validated_token):
+            return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
+
+    def _claims_current(self, token):
+        if "pv" not in token or api_settings.USER_ID_CLAIM not in token:
+            return False
+        if time.time() - token.get("iat", 0) > settings.JWT_CLAIMS_MAX_AGE_SECONDS:
+            return False
+        return token["pv"] == get_permission_version(token[api_settings.USER_ID_CLAIM])
+
+
+def refresh_permission_claims(access, user_id):
+    """
+    Re-issue the claims of a refreshed access token from the database: the
+    ones copied over from the refresh token may be out of date.
+    """
+    from .models import CustomUser
+
+    try:
+        user = CustomUser.objects.get(pk=user_id)
+    except CustomUser.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    return add_permission_claims(access, user)
@@ -0,0 +1,158 @@
+# users/blacklist.py
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken
+
+# Rows revoked this long before the last sync are read again, so a row
+# committed late (older revoked_at, later commit) is not skipped
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, ~`error_rate` false positives."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value)
+        )
+
+
+class RevokedTokens:
+    """
+    Per-process view of RevokedToken.
+
+    A JTI the Bloom filter has never seen is not revoked, which answers the
+    common case without a query. The filter picks up revocations made by
+    other processes every REVOKED_TOKEN_SYNC_SECONDS (one indexed range
+    query) and is rebuilt from the unexpired rows when it fills up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_at = 0.0  # monotonic
+        self._watermark = None  # newest revoked_at seen
+
+    def _new_filter(self):
+        return BloomFilter(
+            settings.REVOKED_TOKEN_BLOOM_CAPACITY, settings.REVOKED_TOKEN_BLOOM_ERROR_RATE
+        )
+
+    def _fresh(self):
+        return (
+            self._filter is not None
+            and time.monotonic() - self._synced_at < settings.REVOKED_TOKEN_SYNC_SECONDS
+        )
+
+    def _sync(self):
+        if self._fresh():
+            return
+        with self._lock:
+            if self._fresh():
+                return
+            synced_at = time.monotonic()
+            rebuild = self._filter is None or self._filter.count >= self._filter.capacity
+            rows = RevokedToken.objects.all()
+            if rebuild:
+                rows = rows.filter(expires_at__gt=timezone.now())
+            else:
+                rows = rows.filter(revoked_at__gte=self._watermark - SYNC_OVERLAP)
+            bloom = self._new_filter() if rebuild else self._filter
+            watermark = self._watermark
+            for jti, revoked_at in rows.values_list("jti", "revoked_at").iterator():
+                bloom.add(jti)
+                watermark = max(watermark, revoked_at) if watermark else revoked_at
+            self._filter = bloom
+            self._watermark = watermark or timezone.now()
+            self._synced_at = synced_at
+
+    def is_revoked(self, jti):
+        self._sync()
+        if jti not in self._filter:
+            return False
+        # Possible false positive: the table has the answer
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """
+        Record `jti` as revoked. Returns False if it already was, which makes
+        a refresh token single-use even when two requests race to rotate it.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {RevokedToken._meta.db_table} (jti, expires_at, revoked_at) "
+                "VALUES (%s, %s, %s) ON CONFLICT (jti) DO NOTHING",
+                [jti, expires_at, timezone.now()],
+            )
+            inserted = cursor.rowcount == 1
+        if self._filter is not None:
+            with self._lock:
+                self._filter.add(jti)
+        return inserted
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._watermark = None
+
+
+revoked_tokens = RevokedTokens()
+
+
+def prune_revoked_tokens(now=None):
+    """Delete rows whose token has expired (it is rejected on exp anyway). Returns the count."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    RefreshToken checked against RevokedToken instead of the
+    token_blacklist app. TokenRefreshSerializer calls blacklist() when
+    BLACKLIST_AFTER_ROTATION is on.
+    """
+
+    def verify(self):
+        super().verify()
+        if revoked_tokens.is_revoked(self[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        expires_at = datetime_from_epoch(self["exp"])
+        if not revoked_tokens.revoke(self[api_settings.JTI_CLAIM], expires_at):
+            raise TokenError("Token is blacklisted")
+
+    def outstand(self):
+        # Only revoked tokens are stored
+        return None
@@ -0,0 +1,156 @@
+# users/login.py
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+logger = logging.getLogger(__name__)
+
+_pool_lock = threading.Lock()
+_executor = None
+_slots = None  # running + queued verifications
+
+
+def _pool():
+    global _executor, _slots
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                workers = settings.LOGIN_HASH_WORKERS or os.cpu_count() or 1
+                _slots = threading.BoundedSemaphore(workers + settings.LOGIN_HASH_QUEUE)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login-hash")
+    return _executor, _slots
+
+
+def run_hasher(func, *args):
+    """
+    Run a password hasher call on the login pool. The request thread still
+    waits for the result, so this does not add throughput: it bounds how
+    many hashes run at once, and past LOGIN_HASH_QUEUE waiting calls a
+    login is turned away (429) instead of piling up CPU-bound work.
+    """
+    executor, slots = _pool()
+    if not slots.acquire(timeout=settings.LOGIN_HASH_QUEUE_TIMEOUT):
+        raise Throttled(detail="Too many logins in progress, please retry shortly.")
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def verify_password(user, raw_password):
+    """user.check_password() with the hashing done on the login pool."""
+    upgrade = []  # the setter only records; the pool threads do not touch the database
+    correct = run_hasher(check_password, raw_password, user.password, upgrade.append)
+    if correct and upgrade:
+        # Same rehash as AbstractBaseUser.check_password, on the request's connection
+        user.set_password(raw_password)
+        user.save(update_fields=["password"])
+    return correct
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend whose password check runs on the login pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords
+            run_hasher(make_password, password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class LastLoginBuffer:
+    """
+    Write-behind last_login. Logins only record (user id, time) in memory;
+    a background thread writes everything recorded every
+    LAST_LOGIN_FLUSH_SECONDS with one UPDATE ... FROM (VALUES ...) per
+    batch, instead of one UPDATE (through CustomUser.save) per login.
+    Entries still buffered when a process is killed are lost, which only
+    leaves last_login slightly older than it should be.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # user id -> last login time
+        self._thread = None
+
+    def record(self, user_id, when=None):
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+            if self._thread is None and settings.LAST_LOGIN_FLUSH_SECONDS > 0:
+                self._thread = threading.Thread(target=self._run, name="last-login", daemon=True)
+                self._thread.start()
+        if settings.LAST_LOGIN_FLUSH_SECONDS <= 0:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered logins now. Returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        table = get_user_model()._meta.db_table
+        updated = 0
+        for start in range(0, len(items), self.BATCH_SIZE):
+            batch = items[start : start + self.BATCH_SIZE]
+            values = ", ".join(["(%s::uuid, %s::timestamptz)"] * len(batch))
+            try:
+                with connection.cursor() as cursor:
+                    # Newer values only: a flush from another process may have won
+                    cursor.execute(
+                        f"UPDATE {table} AS u SET last_login = v.last_login "
+                        f"FROM (VALUES {values}) AS v(id, last_login) "
+                        "WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.last_login)",
+                        [param for user_id, when in batch for param in (str(user_id), when)],
+                    )
+                    updated += cursor.rowcount
+            except Exception:
+                # Keep what was not written for the next flush (newer records win)
+                with self._lock:
+                    for user_id, when in items[start:]:
+                        self._pending.setdefault(user_id, when)
+                raise
+        return updated
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LAST_LOGIN_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write buffered last_login values")
+            finally:
+                # Do not hold a connection between flushes
+                connection.close()
+
+
+last_logins = LastLoginBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        last_logins.flush()
+    except Exception:
+        logger.exception("Could not write buffered last_login values at exit")
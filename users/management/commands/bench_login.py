@@ -0,0 +1,83 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from users.login import last_logins
+from users.models import CustomUser
+from users.serializers import CustomTokenObtainPairSerializer
+
+PASSWORD = "bench-login-Passw0rd!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins/second of this process: the stock path (ModelBackend "
+        "on the request thread, one last_login UPDATE per login) against the "
+        "pooled backend with write-behind last_login. Creates and removes "
+        "temporary users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=32, help="Logins per run.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Simultaneous clients.")
+
+    def handle(self, *args, **options):
+        logins, concurrency = options["logins"], options["concurrency"]
+        # One hash for every user: PBKDF2 is slow by design
+        encoded = make_password(PASSWORD)
+        tag = uuid.uuid4().hex[:8]
+        users = CustomUser.objects.bulk_create(
+            CustomUser(
+                email=f"bench-login-{tag}-{i}@example.com",
+                first_name="Bench",
+                last_name=str(i),
+                password=encoded,
+                is_temp_password=False,
+            )
+            for i in range(logins)
+        )
+        try:
+            with override_settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"]):
+                before = self._run(self._stock_login, users, concurrency)
+            after = self._run(self._pooled_login, users, concurrency)
+            start = time.perf_counter()
+            updated = last_logins.flush()
+            flush = time.perf_counter() - start
+        finally:
+            CustomUser.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        self.stdout.write(f"logins           {logins} with {concurrency} concurrent clients")
+        self.stdout.write(f"stock            {logins / before:>8.2f} logins/s ({before:.2f} s)")
+        self.stdout.write(f"pooled           {logins / after:>8.2f} logins/s ({after:.2f} s)")
+        self.stdout.write(f"last_login flush {flush * 1000:>8.1f} ms for {updated} users")
+
+    def _run(self, login, users, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(login, users))
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _stock_login(user):
+        try:
+            serializer = TokenObtainPairSerializer(data={"email": user.email, "password": PASSWORD})
+            serializer.is_valid(raise_exception=True)
+            # What UPDATE_LAST_LOGIN did
+            update_last_login(None, serializer.user)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _pooled_login(user):
+        try:
+            serializer = CustomTokenObtainPairSerializer(data={"email": user.email, "password": PASSWORD})
+            serializer.is_valid(raise_exception=True)
+        finally:
+            connection.close()
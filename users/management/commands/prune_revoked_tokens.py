@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.blacklist import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete revoked refresh tokens that have expired. Expired tokens are "
+        "rejected on their exp claim, so their rows are no longer needed."
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired revoked tokens."))
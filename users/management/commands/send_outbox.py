@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from users.outbox import drain
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued emails from the outbox with a pool of worker threads. "
+        "Each worker claims a batch and sends it over one SMTP connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument("--once", action="store_true", help="Drain what is due and exit.")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="outbox") as pool:
+            futures = [
+                pool.submit(self._work, options["batch_size"], options["poll_interval"], options["once"])
+                for _ in range(options["workers"])
+            ]
+            try:
+                totals = [future.result() for future in futures]
+            except KeyboardInterrupt:
+                self.stop.set()
+                totals = [future.result() for future in futures]
+
+        sent = sum(total[0] for total in totals)
+        failed = sum(total[1] for total in totals)
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails, {failed} failed attempts."))
+
+    def _work(self, batch_size, poll_interval, once):
+        sent = failed = 0
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                batch_sent, batch_failed = drain(batch_size)
+                sent += batch_sent
+                failed += batch_failed
+                if once:
+                    break
+                self.stop.wait(poll_interval)
+        finally:
+            # Each thread has its own database connection
+            connection.close()
+        return sent, failed
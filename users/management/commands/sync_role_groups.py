@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from users.apps import ROLE_PERMISSIONS
+from users.roles import sync_role_groups
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the role groups and give each exactly the permissions in "
+        "ROLE_PERMISSIONS, writing only what differs. Also runs after migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them.")
+
+    def handle(self, *args, **options):
+        report = sync_role_groups(ROLE_PERMISSIONS, using=options["database"], dry_run=options["dry_run"])
+        for perm in report["missing"]:
+            self.stderr.write(self.style.WARNING(f"Permission {perm} does not exist; run migrate first."))
+        prefix = "Would sync" if options["dry_run"] else "Synced"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} role groups: {len(report['created_groups'])} created, "
+                f"{report['added']} permissions granted, {report['removed']} revoked."
+            )
+        )
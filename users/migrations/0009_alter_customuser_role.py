@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_revoked_token'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='role',
+            field=models.CharField(choices=[('data_entry', 'Data Entry Operator'), ('manager', 'Manager'), ('instructor', 'Instructor'), ('administrator', 'Administrator')], default='candidate', max_length=50),
+        ),
+    ]
@@ -1,10 +1,13 @@
 import datetime
-from django.contrib.auth.models import AbstractUser, Group
+from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.base_user import BaseUserManager
 from django.db import models
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 import uuid
 
+from .roles import apply_role_groups
+
 
 class CustomUserManager(BaseUserManager):
 
@@ -64,6 +67,23 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()  # type: ignore
 
+    # Fields carried in access token claims (users/authentication.py)
+    CLAIM_FIELDS = ("role", "is_active", "is_staff", "is_superuser")
+
+    # Role and claim fields as loaded from the database, to detect changes on save
+    _loaded_role = None
+    _loaded_claims = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.__dict__.get("role")
+        instance._loaded_claims = instance._claims()
+        return instance
+
+    def _claims(self):
+        return tuple(self.__dict__.get(field) for field in self.CLAIM_FIELDS)
+
     def save(self, *args, **kwargs):
         if self.email:
             self.email = self.email.lower()  # Normalize email
@@ -72,12 +92,31 @@ class CustomUser(AbstractUser):
             self.is_staff = True
             self.is_superuser = True
 
+        # Group membership follows the role, so only touch it when the role is
+        # being written and differs from what was loaded (not on e.g. last_login)
+        update_fields = kwargs.get("update_fields")
+        role_changed = (
+            "role" in self.__dict__
+            and (update_fields is None or "role" in update_fields)
+            and (self._state.adding or self.role != self._loaded_role)
+        )
+        claims_changed = (
+            not self._state.adding
+            and (update_fields is None or not set(self.CLAIM_FIELDS).isdisjoint(update_fields))
+            and self._claims() != self._loaded_claims
+        )
+
         super().save(*args, **kwargs)
 
-        # Assign group
-        if self.role:
-            group, _ = Group.objects.get_or_create(name=self.role)
-            self.groups.add(group)
+        if role_changed and self.role:
+            previous = [self._loaded_role] if self._loaded_role else []
+            apply_role_groups([self.pk], self.role, previous)
+        if claims_changed:
+            from .authentication import bump_user_permission_versions
+
+            bump_user_permission_versions([self.pk])
+        self._loaded_role = self.role
+        self._loaded_claims = self._claims()
 
     class Meta:
         indexes = [
@@ -86,3 +125,63 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.email
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email written in the same transaction as the change that
+    triggers it and delivered later by `manage.py send_outbox`.
+
+    `next_attempt_at` doubles as the claim lease: a worker that takes a row
+    pushes it into the future, so rows of a crashed worker become due again.
+    The body may hold a temporary password, so it is emptied once the row
+    is sent or has failed for good.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.EmailField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Only undelivered rows are ever scanned by the worker
+            models.Index(
+                fields=["next_attempt_at"],
+                name="email_outbox_due_idx",
+                condition=models.Q(status__in=["pending", "sending"]),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class RevokedToken(models.Model):
+    """
+    JTIs of refresh tokens that may no longer be used (rotated or logged out).
+
+    Append-only: rows are inserted by users/blacklist.py and only ever
+    deleted by `manage.py prune_revoked_tokens` once the token has expired
+    anyway.
+    """
+
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,109 @@
+# users/onboarding.py
+import codecs
+import csv
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.db import transaction
+
+from .models import CustomUser, EmailOutbox
+from .outbox import welcome_email
+from .roles import get_role_group_ids
+
+# Long enough (~92 bits) that a cheap hash of it is still out of reach offline
+TEMP_PASSWORD_LENGTH = 16
+
+
+def read_onboarding_rows(request):
+    """Rows of a JSON list body or a CSV body (`Content-Type: text/csv`)."""
+    if request.content_type.startswith("text/csv"):
+        reader = csv.DictReader(codecs.iterdecode(request.stream or [], "utf-8"))
+        return [{key: value for key, value in row.items() if key and value != ""} for row in reader]
+    data = request.data
+    if isinstance(data, dict):
+        data = data.get("users", [])
+    return data if isinstance(data, list) else []
+
+
+def hash_temporary_password(password):
+    """
+    PBKDF2 hash of a random temporary password with only
+    ONBOARDING_PASSWORD_ITERATIONS rounds instead of the full count, which
+    is what makes thousands of users per request affordable. The hasher
+    reports the hash as outdated, so Django re-hashes it with the full
+    count on the first successful login or initial-password check.
+    """
+    hasher = get_hasher("pbkdf2_sha256")
+    return hasher.encode(password, hasher.salt(), iterations=settings.ONBOARDING_PASSWORD_ITERATIONS)
+
+
+class Onboarding:
+    """
+    Bulk user creation: validate every row, check emails against the
+    database in one query, hash the temporary passwords cheaply (see
+    hash_temporary_password) and insert users, group memberships and
+    welcome emails with one bulk_create each inside a single transaction.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    def run(self, rows):
+        report = []
+        valid = []  # (report entry, validated data)
+        seen = set()
+        for number, row in enumerate(rows, start=1):
+            serializer = self.serializer_class(data=row)
+            entry = {"row": number, "email": row.get("email") if isinstance(row, dict) else None}
+            report.append(entry)
+            if not serializer.is_valid():
+                entry.update(status="error", errors=serializer.errors)
+                continue
+            email = serializer.validated_data["email"]
+            if email in seen:
+                entry.update(status="error", errors={"email": ["Duplicate email in this import."]})
+                continue
+            seen.add(email)
+            valid.append((entry, serializer.validated_data))
+
+        existing = set(
+            CustomUser.objects.filter(email__in=seen).values_list("email", flat=True)
+        )
+        pending = []
+        for entry, data in valid:
+            if data["email"] in existing:
+                entry.update(status="error", errors={"email": ["This email is already registered"]})
+            else:
+                pending.append((entry, data))
+
+        if pending:
+            self._create(pending)
+        return report
+
+    def _create(self, pending):
+        passwords = [CustomUser.objects.make_random_password(TEMP_PASSWORD_LENGTH) for _ in pending]
+        hashes = [hash_temporary_password(password) for password in passwords]
+
+        users = []
+        for (entry, data), hashed in zip(pending, hashes):
+            # Mirrors CustomUser.save(), which bulk_create bypasses
+            user = CustomUser(**data, password=hashed)
+            if user.role == "administrator":
+                user.is_staff = user.is_superuser = True
+            users.append(user)
+
+        groups = get_role_group_ids({user.role for user in users if user.role})
+        Membership = CustomUser.groups.through
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+            Membership.objects.bulk_create(
+                Membership(customuser_id=user.pk, group_id=groups[user.role])
+                for user in users
+                if user.role
+            )
+            EmailOutbox.objects.bulk_create(
+                welcome_email(user, password) for user, password in zip(users, passwords)
+            )
+
+        for (entry, _), user in zip(pending, users):
+            entry.update(status="created", id=str(user.pk))
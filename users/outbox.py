@@ -0,0 +1,132 @@
+# users/outbox.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# A claimed row is retried by another worker if not finished within this lease
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=6)
+
+
+def welcome_email(user, password):
+    """Unsaved outbox row with the temporary password and set-password link."""
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    reset_url = f"{settings.CLIENT_URL}/auth/set-initial-password/{uid}/{token}/"
+
+    subject = "Welcome to the HR App - Set Your Password"
+    message = (
+        f"Hello {user.first_name},\n\n"
+        "An account has been created for you on the HR App.\n\n"
+        f"Your temporary password is: {password}\n\n"
+        "Please set your permanent password by clicking the link below:\n"
+        f"{reset_url}\n\n"
+        "Thank you,\n"
+        "The HR App Team"
+    )
+    return EmailOutbox(to_email=user.email, subject=subject, body=message)
+
+
+def claim_batch(size=None):
+    """
+    Take up to `size` due rows for this worker. SKIP LOCKED lets several
+    workers claim concurrently without waiting on (or double-sending) each
+    other's rows; the lease makes them due again if this worker dies.
+    """
+    size = size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                status="sending", next_attempt_at=now + CLAIM_LEASE
+            )
+    return rows
+
+
+def deliver_batch(rows, connection=None):
+    """
+    Send `rows` over a single SMTP connection and record the outcome.
+    Failures are rescheduled with exponential backoff until
+    EMAIL_OUTBOX_MAX_ATTEMPTS, then marked failed. The body is cleared once
+    a row is sent or failed for good. Returns (sent, failed).
+    """
+    if not rows:
+        return 0, 0
+    connection = connection or get_connection(timeout=settings.EMAIL_TIMEOUT)
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as e:
+        # Server unreachable: the whole batch counts as one failed attempt
+        for row in rows:
+            _reschedule(row, e)
+        failed = len(rows)
+    else:
+        try:
+            for row in rows:
+                message = EmailMessage(
+                    row.subject,
+                    row.body,
+                    row.from_email or settings.DEFAULT_FROM_EMAIL,
+                    [row.to_email],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    _reschedule(row, e)
+                    failed += 1
+                else:
+                    row.status, row.sent_at, row.last_error = "sent", timezone.now(), ""
+                    row.attempts += 1
+                    # Welcome emails carry a temporary password; keep no copy once delivered
+                    row.body = ""
+                    sent += 1
+        finally:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(
+        rows, ["status", "attempts", "next_attempt_at", "last_error", "sent_at", "body"]
+    )
+    return sent, failed
+
+
+def _reschedule(row, error):
+    row.attempts += 1
+    row.last_error = f"{type(error).__name__}: {error}"
+    if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        row.status = "failed"
+        row.body = ""
+        logger.error(f"Giving up on email {row.pk} to {row.to_email}: {row.last_error}")
+        return
+    delay = timedelta(seconds=settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (row.attempts - 1))
+    row.status = "pending"
+    row.next_attempt_at = timezone.now() + min(delay, MAX_BACKOFF)
+
+
+def drain(batch_size=None):
+    """Deliver due rows until none are left. Returns (sent, failed)."""
+    sent = failed = 0
+    while True:
+        rows = claim_batch(batch_size)
+        if not rows:
+            return sent, failed
+        batch_sent, batch_failed = deliver_batch(rows)
+        sent += batch_sent
+        failed += batch_failed
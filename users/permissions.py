@@ -0,0 +1,103 @@
+# users/permissions.py
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from rest_framework import permissions
+
+from backend.versions import bump_version, get_version
+
+ROLE_PERMISSIONS_KEY = "users:role_permissions:{}"
+
+
+def get_role_permissions():
+    """
+    {role: frozenset of "app_label.codename"} for every role group, read
+    from the groups table with one query and cached in this process under
+    the shared "role_permissions" version, so a change made by any worker
+    is seen everywhere within SHARED_VERSION_POLL_SECONDS (see
+    clear_role_permissions).
+    """
+    return _load_role_permissions()["roles"]
+
+
+def get_detached_users():
+    """Ids of users whose role group membership is missing; their role grants nothing by itself."""
+    return _load_role_permissions()["detached"]
+
+
+def _load_role_permissions():
+    key = ROLE_PERMISSIONS_KEY.format(get_version("role_permissions"))
+    loaded = cache.get(key)
+    if loaded is None:
+        from .models import CustomUser
+
+        roles = [value for value, _ in CustomUser.ROLE_CHOICES]
+        collected = {role: set() for role in roles}
+        for role, app_label, codename in Permission.objects.filter(
+            group__name__in=roles
+        ).values_list("group__name", "content_type__app_label", "codename"):
+            collected[role].add(f"{app_label}.{codename}")
+        membership = CustomUser.groups.through.objects.filter(
+            customuser_id=OuterRef("pk"), group__name=OuterRef("role")
+        )
+        detached = CustomUser.objects.filter(role__in=roles).filter(~Exists(membership))
+        loaded = {
+            "roles": {role: frozenset(perms) for role, perms in collected.items()},
+            "detached": frozenset(detached.values_list("pk", flat=True)),
+        }
+        cache.set(key, loaded, timeout=None)
+    return loaded
+
+
+def clear_role_permissions(sender=None, **kwargs):
+    """
+    m2m_changed receiver for Group.permissions and CustomUser.groups and
+    post_save/post_delete receiver for Group; also called after the bulk
+    writes of sync_role_groups and apply_role_groups.
+    """
+    bump_version("role_permissions")
+
+
+def user_has_perms(user, perms):
+    """
+    user.has_perms() answered from the role's permission set without a query.
+    The role only counts while the user is a member of its group. When it
+    does not grant everything, has_perms() decides, which also sees direct
+    user permissions and extra groups.
+    """
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    role_perms = get_role_permissions().get(getattr(user, "role", None), frozenset())
+    if role_perms.issuperset(perms) and user.pk not in get_detached_users():
+        return True
+    return user.has_perms(perms)
+
+
+class CustomDjangoModelPermissions(permissions.DjangoModelPermissions):
+    perms_map = {
+        "GET": ["%(app_label)s.view_%(model_name)s"],
+        "OPTIONS": [],
+        "HEAD": [],
+        "POST": ["%(app_label)s.add_%(model_name)s"],
+        "PUT": ["%(app_label)s.change_%(model_name)s"],
+        "PATCH": ["%(app_label)s.change_%(model_name)s"],
+        "DELETE": ["%(app_label)s.delete_%(model_name)s"],
+    }
+
+    def has_permission(self, request, view):
+        # DjangoModelPermissions.has_permission with the role permission cache
+        if not request.user or (
+            not request.user.is_authenticated and self.authenticated_users_only
+        ):
+            return False
+
+        # Workaround to ensure DjangoModelPermissions are not applied
+        # to the root view when using DefaultRouter.
+        if getattr(view, "_ignore_model_permissions", False):
+            return True
+
+        queryset = self._queryset(view)
+        perms = self.get_required_permissions(request.method, queryset.model)
+        return user_has_perms(request.user, perms)
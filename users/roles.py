@@ -0,0 +1,179 @@
+# users/roles.py
+from functools import partial
+
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models import Q
+
+_group_ids = {}  # role name -> Group id
+
+
+def get_role_group_ids(roles):
+    """
+    Group ids for `roles` from a per-process map; unknown roles are looked up
+    (and their groups created) once, after that no query is needed.
+    """
+    roles = set(roles)
+    # Snapshot first: creating a group below fires clear_role_groups
+    known = {role: _group_ids[role] for role in roles if role in _group_ids}
+    missing = roles - set(known)
+    if missing:
+        found = dict(Group.objects.filter(name__in=missing).values_list("name", "id"))
+        for role in missing - set(found):
+            found[role] = Group.objects.get_or_create(name=role)[0].pk
+        transaction.on_commit(partial(_remember_group_ids, found))
+        known.update(found)
+    return known
+
+
+def _remember_group_ids(found):
+    # Runs on commit: a group created in a transaction that rolls back must
+    # not stay in the map, or later memberships point at a missing row
+    _group_ids.update(found)
+
+
+def get_role_group_id(role):
+    return get_role_group_ids([role])[role]
+
+
+def clear_role_groups(sender=None, **kwargs):
+    """post_save/post_delete receiver for Group: renamed or deleted groups drop the map."""
+    _group_ids.clear()
+
+
+def apply_role_groups(user_ids, role, previous_roles=None):
+    """
+    Move `user_ids` into the group of `role` with set-based queries: drop
+    their memberships in the `previous_roles` groups (every role group when
+    None) and insert the new one, skipping users who already have it.
+    """
+    from .models import CustomUser
+    from .permissions import clear_role_permissions
+
+    Membership = CustomUser.groups.through
+    if previous_roles is None:
+        previous_roles = [value for value, _ in CustomUser.ROLE_CHOICES]
+    previous = set(get_role_group_ids(previous_roles).values()) if previous_roles else set()
+    group_id = get_role_group_id(role)
+
+    with transaction.atomic():
+        stale = previous - {group_id}
+        if stale:
+            Membership.objects.filter(customuser_id__in=user_ids, group_id__in=stale).delete()
+        Membership.objects.bulk_create(
+            [Membership(customuser_id=user_id, group_id=group_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+    # The bulk writes above send no signals
+    clear_role_permissions()
+
+
+def change_roles(user_ids, role):
+    """
+    Reassign many users to `role` with a fixed number of set-based
+    statements, however many users there are. Returns the number updated.
+    """
+    from .authentication import bump_user_permission_versions
+    from .models import CustomUser
+
+    fields = {"role": role}
+    if role == "administrator":
+        # Same rule as CustomUser.save()
+        fields.update(is_staff=True, is_superuser=True)
+    with transaction.atomic():
+        user_ids = list(
+            CustomUser.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+        )
+        updated = CustomUser.objects.filter(pk__in=user_ids).update(**fields)
+        if user_ids:
+            apply_role_groups(user_ids, role)
+    # update() bypasses CustomUser.save(), which outdates token claims
+    bump_user_permission_versions(user_ids)
+    return updated
+
+
+def sync_role_groups(role_permissions, using="default", dry_run=False):
+    """
+    Make the role groups hold exactly `role_permissions` ({role: ["app_label.codename"]}).
+    A role whose list resolves to no permissions (e.g. "instructor" and
+    "data_entry") only gets its group: whatever was granted to it by hand
+    is kept, as before.
+
+    Idempotent and set-based: one query each for the groups, the permissions
+    and the current group permissions, then only the missing groups and the
+    changed rows are written. Permissions that do not exist yet (their app
+    is not migrated) are reported in "missing" and left for the next run.
+    """
+    from .authentication import bump_permission_version
+    from .permissions import clear_role_permissions
+
+    Grant = Group.permissions.through
+    report = {"created_groups": [], "added": 0, "removed": 0, "missing": []}
+
+    groups = dict(
+        Group.objects.using(using).filter(name__in=role_permissions).values_list("name", "id")
+    )
+    report["created_groups"] = sorted(set(role_permissions) - set(groups))
+
+    wanted = {perm for perms in role_permissions.values() for perm in perms}
+    app_labels = {perm.split(".")[0] for perm in wanted}
+    codenames = {perm.split(".")[1] for perm in wanted}
+    permission_ids = {}
+    for pk, app_label, codename in (
+        Permission.objects.using(using)
+        .filter(content_type__app_label__in=app_labels, codename__in=codenames)
+        .values_list("pk", "content_type__app_label", "codename")
+    ):
+        if f"{app_label}.{codename}" in wanted:
+            permission_ids[f"{app_label}.{codename}"] = pk
+    report["missing"] = sorted(wanted - set(permission_ids))
+    managed = {
+        role: [perm for perm in perms if perm in permission_ids]
+        for role, perms in role_permissions.items()
+        if any(perm in permission_ids for perm in perms)
+    }
+
+    current = set(
+        Grant.objects.using(using)
+        .filter(group_id__in=[groups[role] for role in managed if role in groups])
+        .values_list("group_id", "permission_id")
+    )
+
+    def desired():
+        return {
+            (groups.get(role), permission_ids[perm])
+            for role, perms in managed.items()
+            for perm in perms
+        }
+
+    if dry_run or not (report["created_groups"] or desired() != current):
+        report["added"] = len(desired() - current)
+        report["removed"] = len(current - desired())
+        return report
+
+    with transaction.atomic(using=using):
+        if report["created_groups"]:
+            created = Group.objects.using(using).bulk_create(
+                [Group(name=role) for role in report["created_groups"]]
+            )
+            groups.update((group.name, group.pk) for group in created)
+        wanted_grants = desired()
+        stale = current - wanted_grants
+        if stale:
+            revoke = Q(pk__in=[])
+            for group_id, permission_id in stale:
+                revoke |= Q(group_id=group_id, permission_id=permission_id)
+            Grant.objects.using(using).filter(revoke).delete()
+        new = wanted_grants - current
+        if new:
+            Grant.objects.using(using).bulk_create(
+                [Grant(group_id=group_id, permission_id=permission_id) for group_id, permission_id in new]
+            )
+    report["added"], report["removed"] = len(new), len(stale)
+
+    # The bulk writes above send no signals
+    if report["created_groups"]:
+        clear_role_groups()
+    clear_role_permissions()
+    bump_permission_version()
+    return report
@@ -1,20 +1,28 @@
-from datetime import date, datetime, timedelta
-from email.message import EmailMessage
+from datetime import date, datetime
 
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.db import IntegrityError
-from django.utils.encoding import force_bytes, force_str
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.db import IntegrityError, transaction
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from rest_framework import serializers
 import logging
-from django.core.mail import send_mail
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
 from django.contrib.auth.password_validation import (
     validate_password as validate_password_strength,
 )
 
+from .authentication import add_permission_claims, refresh_permission_claims
+from .blacklist import RevocableRefreshToken, revoked_tokens
+from .login import last_logins
 from .models import CustomUser
+from .outbox import welcome_email
 
 
 logger = logging.getLogger(__name__)
@@ -77,40 +85,13 @@ class UserSignupSerializer(serializers.ModelSerializer):
             # Use the custom manager's `create_user` method for atomic user creation
             password = CustomUser.objects.make_random_password()
             email = validated_data.pop("email")
-            user = CustomUser.objects.create_user(
-                email=email, password=password, **validated_data
-            )
-
-            # --- Send Welcome Email with Temporary Password and Reset Link (handled gracefully) ---
-            try:
-                token = default_token_generator.make_token(user)
-                uid = urlsafe_base64_encode(force_bytes(user.pk))
-                reset_url = (
-                    f"{settings.CLIENT_URL}/auth/set-initial-password/{uid}/{token}/"
-                )
-
-                subject = "Welcome to the HR App - Set Your Password"
-                message = (
-                    f"Hello {user.first_name},\n\n"
-                    "An account has been created for you on the HR App.\n\n"
-                    f"Your temporary password is: {password}\n\n"
-                    "Please set your permanent password by clicking the link below:\n"
-                    f"{reset_url}\n\n"
-                    "Thank you,\n"
-                    "The HR App Team"
-                )
-
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=False,  # Keep False to ensure errors are raised here and caught by our inner try-except
-                )
-            except Exception as email_exc:
-                logger.error(
-                    f"Failed to send welcome email to {user.email}: {email_exc}"
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    email=email, password=password, **validated_data
                 )
+                # Welcome email with temporary password and reset link goes through
+                # the outbox (committed with the user, sent by `manage.py send_outbox`)
+                welcome_email(user, password).save()
 
             return user
         except IntegrityError as e:
@@ -128,6 +109,30 @@ class UserSignupSerializer(serializers.ModelSerializer):
             )
 
 
+class OnboardingUserSerializer(UserSignupSerializer):
+    # Uniqueness is checked for the whole batch in one query by Onboarding
+    email = serializers.EmailField(required=True)
+
+
+class OnboardingResultSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    email = serializers.CharField(allow_null=True)
+    status = serializers.ChoiceField(choices=["created", "error"])
+    id = serializers.UUIDField(required=False)
+    errors = serializers.DictField(required=False)
+
+
+class RoleChangeSerializer(serializers.Serializer):
+    users = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=10000
+    )
+    role = serializers.ChoiceField(choices=CustomUser.ROLE_CHOICES)
+
+
+class RoleChangeResponseSerializer(serializers.Serializer):
+    updated = serializers.IntegerField()
+
+
 class InitialPasswordSetSerializer(serializers.Serializer):
     id = serializers.CharField(write_only=True)
     access = serializers.CharField(write_only=True)
@@ -253,8 +258,12 @@ class UserSerializer(serializers.ModelSerializer):
 
 # Auth
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
+        # UPDATE_LAST_LOGIN is off: last_login is written behind (users/login.py)
+        last_logins.record(self.user.pk)
         data["role"] = self.user.role
         data["id"] = str(self.user.id)
         data["email"] = self.user.email
@@ -266,4 +275,30 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError(
                 "Please set password again. Check your inbox for further instructions from '@hrapp.com'"
             )
+        if settings.JWT_STATELESS_AUTH:
+            access = add_permission_claims(AccessToken(data["access"]), self.user)
+            data["access"] = str(access)
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    # Rotated refresh tokens are revoked in RevokedToken (users/blacklist.py)
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if settings.JWT_STATELESS_AUTH:
+            access = AccessToken(data["access"])
+            access = refresh_permission_claims(access, access[api_settings.USER_ID_CLAIM])
+            data["access"] = str(access)
         return data
+
+
+class CustomTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if token.get(api_settings.TOKEN_TYPE_CLAIM) == "refresh" and revoked_tokens.is_revoked(
+            token[api_settings.JTI_CLAIM]
+        ):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
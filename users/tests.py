@@ -0,0 +1,483 @@
+import datetime
+import re
+import socketserver
+import threading
+import uuid
+
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend import versions
+from questions.models import Domain
+from .apps import ROLE_PERMISSIONS
+from .authentication import ClaimsJWTAuthentication, ClaimsUser, add_permission_claims
+from .blacklist import RevocableRefreshToken, prune_revoked_tokens, revoked_tokens
+from .login import last_logins
+from .models import CustomUser, EmailOutbox, RevokedToken
+from .onboarding import TEMP_PASSWORD_LENGTH
+from .outbox import drain, welcome_email
+from .permissions import clear_role_permissions, get_detached_users, get_role_permissions, user_has_perms
+from .roles import change_roles, get_role_group_ids, sync_role_groups
+
+
+# Requests are only timed where a test asks for it, so the sampled JSON log
+# lines stay out of the test output
+_no_request_timing = override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+
+
+def setUpModule():
+    _no_request_timing.enable()
+
+
+def tearDownModule():
+    _no_request_timing.disable()
+
+
+@override_settings(SHARED_VERSION_POLL_SECONDS=60)
+class RolePermissionCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Domain.objects.create(name="Chemical")
+        cls.manager = CustomUser.objects.create_user(
+            email="manager@example.com", first_name="Mia", last_name="Ng", role="manager"
+        )
+        cls.instructor = CustomUser.objects.create_user(
+            email="instructor@example.com", first_name="Ian", last_name="Ode", role="instructor"
+        )
+
+    def setUp(self):
+        clear_role_permissions()
+        self.client = APIClient()
+
+    def test_warm_read_costs_no_queries(self):
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+
+    def test_group_permission_change_invalidates(self):
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 403)
+        group = Group.objects.get(name="instructor")
+        group.permissions.add(Permission.objects.get(codename="view_domain"))
+        self.assertIn("questions.view_domain", get_role_permissions()["instructor"])
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+
+    def test_revoked_permission_is_denied(self):
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+        Group.objects.get(name="manager").permissions.remove(Permission.objects.get(codename="view_domain"))
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 403)
+
+    def test_revocation_by_another_worker_is_seen(self):
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+        # Another process revoked it: no signal fires here, only the shared version moves
+        Group.permissions.through.objects.filter(
+            group__name="manager", permission__codename="view_domain"
+        ).delete()
+        caches["shared"].set("versions:role_permissions", "bumped-elsewhere", timeout=None)
+        with override_settings(SHARED_VERSION_POLL_SECONDS=0):
+            self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 403)
+
+    def test_role_without_group_membership_grants_nothing(self):
+        self.client.force_authenticate(self.manager)
+        self.manager.groups.clear()
+        self.assertIn(self.manager.pk, get_detached_users())
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 403)
+        # The fallback still honours permissions granted another way
+        self.manager.user_permissions.add(Permission.objects.get(codename="view_domain"))
+        manager = CustomUser.objects.get(pk=self.manager.pk)
+        self.client.force_authenticate(manager)
+        self.assertEqual(self.client.get("/api/v1/questions/domains/").status_code, 200)
+
+
+@override_settings(SHARED_VERSION_POLL_SECONDS=60)
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            email="manager@example.com", first_name="Mia", last_name="Ng", role="manager"
+        )
+
+    def setUp(self):
+        # Versions remembered from earlier tests were rolled back with them
+        versions._seen.clear()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def token(self):
+        return add_permission_claims(AccessToken.for_user(self.manager), self.manager)
+
+    def test_current_claims_need_no_queries(self):
+        token = self.token()
+        get_role_permissions()
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertTrue(user_has_perms(user, ["questions.view_question"]))
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.role, "manager")
+
+    def test_token_issued_by_another_worker_is_current(self):
+        token = self.token()
+        # A fresh process: it knows no versions and has its own default cache
+        versions._seen.clear()
+        cache.clear()
+        self.assertIsInstance(self.authenticate(token), ClaimsUser)
+
+    def test_bump_by_another_worker_is_seen(self):
+        token = self.token()
+        # Another process changed the user's role: only the shared version moves
+        caches["shared"].set(f"versions:permissions:{self.manager.pk}", "bumped-elsewhere", timeout=None)
+        self.assertIsInstance(self.authenticate(token), ClaimsUser)
+        with override_settings(SHARED_VERSION_POLL_SECONDS=0):
+            self.assertIsInstance(self.authenticate(token), CustomUser)
+
+    def test_detached_claims_user_gets_nothing_from_the_role(self):
+        self.manager.groups.clear()
+        user = self.authenticate(self.token())
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.manager.pk)
+        self.assertFalse(user_has_perms(user, ["questions.view_question"]))
+
+    def test_role_change_falls_back_to_database(self):
+        token = self.token()
+        change_roles([self.manager.pk], "instructor")
+        user = self.authenticate(token)
+        self.assertIsInstance(user, CustomUser)
+        self.assertEqual(user.role, "instructor")
+
+    def test_deactivated_user_is_rejected(self):
+        token = self.token()
+        self.manager.is_active = False
+        self.manager.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+
+class RoleGroupSyncTests(TestCase):
+    def test_sync_is_idempotent_and_set_based(self):
+        # Three reads and no writes once the groups match
+        with self.assertNumQueries(3):
+            report = sync_role_groups(ROLE_PERMISSIONS)
+        self.assertEqual((report["added"], report["removed"], report["missing"]), (0, 0, []))
+
+    def test_sync_repairs_drift(self):
+        manager = Group.objects.get(name="manager")
+        manager.permissions.remove(Permission.objects.get(codename="view_domain"))
+        manager.permissions.add(Permission.objects.get(codename="delete_customuser"))
+        report = sync_role_groups(ROLE_PERMISSIONS)
+        self.assertEqual((report["added"], report["removed"]), (1, 1))
+        self.assertIn("questions.view_domain", get_role_permissions()["manager"])
+        self.assertNotIn("users.delete_customuser", get_role_permissions()["manager"])
+
+    def test_roles_without_permissions_keep_manual_grants(self):
+        Group.objects.get(name="instructor").permissions.add(Permission.objects.get(codename="view_domain"))
+        report = sync_role_groups(ROLE_PERMISSIONS)
+        self.assertEqual((report["added"], report["removed"]), (0, 0))
+        self.assertIn("questions.view_domain", get_role_permissions()["instructor"])
+
+
+class RoleGroupMembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="roles-admin@example.com", password="x", first_name="Ro", last_name="Les"
+        )
+        cls.users = [
+            CustomUser.objects.create_user(email=f"member{i}@example.com", first_name="Me", last_name="Mber", role="data_entry")
+            for i in range(3)
+        ]
+
+    def groups(self, user):
+        return list(CustomUser.objects.get(pk=user.pk).groups.values_list("name", flat=True))
+
+    def test_saves_without_a_role_change_skip_the_group_queries(self):
+        user = CustomUser.objects.get(pk=self.users[0].pk)
+        user.last_login = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        with self.assertNumQueries(1):
+            user.save(update_fields=["last_login"])
+        user.set_password("n3w-pass!word")
+        with self.assertNumQueries(1):
+            user.save(update_fields=["password"])
+        user.first_name = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertFalse([query for query in queries if "group" in query["sql"]])
+
+    def test_role_change_moves_the_user_to_the_new_group_only(self):
+        user = CustomUser.objects.get(pk=self.users[0].pk)
+        user.role = "manager"
+        user.save()
+        self.assertEqual(self.groups(user), ["manager"])
+
+    def test_change_role_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        ids = [str(user.pk) for user in self.users[:2]]
+        response = client.post("/api/v1/users/change-role/", {"users": ids, "role": "instructor"}, format="json")
+        self.assertEqual((response.status_code, response.data), (200, {"updated": 2}))
+        self.assertEqual([self.groups(user) for user in self.users], [["instructor"], ["instructor"], ["data_entry"]])
+
+        client.force_authenticate(self.users[2])
+        response = client.post("/api/v1/users/change-role/", {"users": ids, "role": "manager"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_rolled_back_group_is_not_remembered(self):
+        Group.objects.filter(name="instructor").delete()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            get_role_group_ids(["instructor"])
+            raise RuntimeError
+        user = CustomUser.objects.get(pk=self.users[0].pk)
+        user.role = "instructor"
+        user.save()
+        self.assertEqual(self.groups(user), ["instructor"])
+
+
+class RefreshTokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email="rotate@example.com", first_name="Ro", last_name="Tate", role="instructor"
+        )
+
+    def setUp(self):
+        revoked_tokens.clear()
+
+    def refresh(self, token):
+        return APIClient().post("/api/token/refresh/", {"refresh": str(token)}, format="json")
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = RevocableRefreshToken.for_user(self.user)
+        first = self.refresh(token)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotEqual(first.data["refresh"], str(token))
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(first.data["refresh"]).status_code, 200)
+
+    def test_unrevoked_check_needs_no_query_once_synced(self):
+        RevocableRefreshToken.for_user(self.user).blacklist()
+        revoked_tokens.is_revoked("warm-up")
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked(str(uuid.uuid4())))
+
+    def test_prune_drops_expired_rows_only(self):
+        revoked_tokens.revoke("old", datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        RevocableRefreshToken.for_user(self.user).blacklist()
+        self.assertEqual(prune_revoked_tokens(), 1)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], LAST_LOGIN_FLUSH_SECONDS=60
+)
+class LoginPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create_user(
+                email=f"login{i}@example.com", first_name="Lo", last_name="Gin", password="s3cret!pw"
+            )
+            for i in range(3)
+        ]
+        CustomUser.objects.update(is_temp_password=False)
+
+    def setUp(self):
+        last_logins.flush()
+
+    def test_login_defers_last_login(self):
+        response = APIClient().post(
+            "/api/token/", {"email": "login0@example.com", "password": "s3cret!pw"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(CustomUser.objects.get(pk=self.users[0].pk).last_login)
+        self.assertEqual(last_logins.flush(), 1)
+        self.assertIsNotNone(CustomUser.objects.get(pk=self.users[0].pk).last_login)
+
+    def test_wrong_password_is_rejected(self):
+        response = APIClient().post(
+            "/api/token/", {"email": "login0@example.com", "password": "nope"}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_flush_is_one_statement(self):
+        for user in self.users:
+            last_logins.record(user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(last_logins.flush(), 3)
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    Minimal SMTP server for tests (smtpd is gone from Python 3.12). It
+    records delivered messages and connections, and rejects recipients in
+    `refused`.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, refused=()):
+        super().__init__(("127.0.0.1", 0), SMTPStandInHandler)
+        self.refused = set(refused)
+        self.messages = []
+        self.connections = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ready")
+        recipients, data = [], None
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if data is not None:
+                if line == ".":
+                    self.server.messages.append((recipients, "\n".join(data)))
+                    recipients, data = [], None
+                    self.reply("250 queued")
+                else:
+                    data.append(line[1:] if line.startswith("..") else line)
+                continue
+            command = line[:4].upper()
+            if command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>")
+                if address in self.server.refused:
+                    self.reply("550 no such user")
+                    continue
+                recipients.append(address)
+            elif command == "DATA":
+                data = []
+                self.reply("354 go ahead")
+                continue
+            elif command == "RSET":
+                recipients = []
+            self.reply("250 ok")
+
+
+class OutboxDeliveryTests(TestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create_user(email=f"welcome{i}@example.com", first_name=f"W{i}", last_name="E")
+            for i in range(3)
+        ]
+
+    def queue(self, user):
+        row = welcome_email(user, "Temp-Pass-123")
+        row.save()
+        return row
+
+    def send(self, server, max_attempts=1):
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_OUTBOX_MAX_ATTEMPTS=max_attempts,
+        ):
+            return drain(batch_size=10)
+
+    def test_batch_goes_over_one_connection_and_drops_the_password(self):
+        rows = [self.queue(user) for user in self.users]
+        with SMTPStandIn() as server:
+            self.assertEqual(self.send(server), (3, 0))
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(sorted(recipients[0] for recipients, _ in server.messages), [user.email for user in self.users])
+        self.assertIn("Temp-Pass-123", server.messages[0][1])
+        for row in rows:
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts, row.body), ("sent", 1, ""))
+
+    def test_permanent_failure_drops_the_password(self):
+        delivered, refused = self.queue(self.users[0]), self.queue(self.users[1])
+        with SMTPStandIn(refused=[self.users[1].email]) as server:
+            self.assertEqual(self.send(server), (1, 1))
+
+        refused.refresh_from_db()
+        self.assertEqual((refused.status, refused.body), ("failed", ""))
+        self.assertIn("SMTPRecipientsRefused", refused.last_error)
+        delivered.refresh_from_db()
+        self.assertEqual(delivered.status, "sent")
+
+    def test_retryable_failure_keeps_the_body(self):
+        row = self.queue(self.users[0])
+        with SMTPStandIn(refused=[self.users[0].email]) as server:
+            self.assertEqual(self.send(server, max_attempts=3), (0, 1))
+        row.refresh_from_db()
+        self.assertEqual(row.status, "pending")
+        self.assertIn("Temp-Pass-123", row.body)
+
+
+@override_settings(ONBOARDING_PASSWORD_ITERATIONS=1000)
+class BulkOnboardingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            email="onboard-admin@example.com", password="x", first_name="On", last_name="Board"
+        )
+        CustomUser.objects.create_user(email="taken@example.com", first_name="Ta", last_name="Ken")
+
+    def onboard(self, rows):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.post("/api/v1/users/bulk-onboard/", rows, format="json")
+
+    def row(self, email, **extra):
+        return {"email": email, "first_name": "New", "last_name": "Hire", "date_joined": "2026-01-05", **extra}
+
+    def temporary_password(self, email):
+        body = EmailOutbox.objects.get(to_email=email).body
+        return re.search(r"temporary password is: (\S+)", body).group(1)
+
+    def test_rows_are_created_or_reported(self):
+        response = self.onboard(
+            [
+                self.row("new1@example.com", role="manager"),
+                self.row("NEW1@example.com"),
+                self.row("taken@example.com"),
+                self.row("new2@example.com"),
+                {"email": "broken"},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry["status"] for entry in response.data], ["created", "error", "error", "created", "error"])
+        manager = CustomUser.objects.get(email="new1@example.com")
+        self.assertEqual(list(manager.groups.values_list("name", flat=True)), ["manager"])
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+    def test_temporary_passwords_are_cheap_and_upgraded_at_first_login(self):
+        self.onboard([self.row("hire@example.com")])
+        user = CustomUser.objects.get(email="hire@example.com")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        password = self.temporary_password("hire@example.com")
+        self.assertEqual(len(password), TEMP_PASSWORD_LENGTH)
+
+        # Rejected until the initial password is set, but the hash is upgraded
+        response = APIClient().post("/api/token/", {"email": user.email, "password": password}, format="json")
+        self.assertEqual(response.status_code, 400)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(f"pbkdf2_sha256${get_hasher('pbkdf2_sha256').iterations}$"))
+        self.assertTrue(user.check_password(password))
@@ -1,11 +1,14 @@
+from django.conf import settings
+from django.db import IntegrityError
 from rest_framework import viewsets, permissions, status
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 from rest_framework.decorators import action
 from drf_spectacular.utils import extend_schema
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
+from backend.router import ReplicaReadMixin
 from .serializers import (
     ErrorSerializer,
     EmailCheckRequestSerializer,
@@ -17,24 +20,28 @@ from .serializers import (
     SetPasswordSerializer,
     InitialPasswordSetSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
+    CustomTokenVerifySerializer,
+    OnboardingUserSerializer,
+    OnboardingResultSerializer,
+    RoleChangeSerializer,
+    RoleChangeResponseSerializer,
 )
 from .models import CustomUser
+from .onboarding import Onboarding, read_onboarding_rows
+from .permissions import CustomDjangoModelPermissions
+from .roles import change_roles
 
 
-class CustomDjangoModelPermissions(permissions.DjangoModelPermissions):
-    perms_map = {
-        "GET": ["%(app_label)s.view_%(model_name)s"],
-        "OPTIONS": [],
-        "HEAD": [],
-        "POST": ["%(app_label)s.add_%(model_name)s"],
-        "PUT": ["%(app_label)s.change_%(model_name)s"],
-        "PATCH": ["%(app_label)s.change_%(model_name)s"],
-        "DELETE": ["%(app_label)s.delete_%(model_name)s"],
-    }
+class ChangeActionPermissions(CustomDjangoModelPermissions):
+    # POST actions that modify existing users need the change permission
+    perms_map = {**CustomDjangoModelPermissions.perms_map, "POST": ["%(app_label)s.change_%(model_name)s"]}
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
+    # User listings only; a single user is usually read right after an edit
+    replica_read_actions = ("list",)
 
     permission_classes = [CustomDjangoModelPermissions]
     authentication_classes = [JWTAuthentication]
@@ -113,6 +120,47 @@ class UserViewSet(viewsets.ModelViewSet):
 
         return Response({"message": "Password has been reset successfully."})
 
+    @extend_schema(
+        request=OnboardingUserSerializer(many=True),
+        responses={200: OnboardingResultSerializer(many=True)},
+    )
+    @action(methods=["post"], detail=False, url_path="bulk-onboard")
+    def bulk_onboard(self, request: Request):
+        """
+        Create many users from a JSON list (or `{"users": [...]}`) or a CSV
+        body with the signup fields as columns. Welcome emails are queued in
+        the outbox. Returns one result per row.
+        """
+        rows = read_onboarding_rows(request)
+        if len(rows) > settings.ONBOARDING_MAX_ROWS:
+            raise ValidationError(
+                {"message": f"At most {settings.ONBOARDING_MAX_ROWS} users per request."}
+            )
+        try:
+            report = Onboarding(OnboardingUserSerializer).run(rows)
+        except IntegrityError:
+            # An email was registered concurrently; nothing from this batch was written
+            raise ValidationError(
+                {"message": "Some emails were registered meanwhile, please retry."}
+            )
+        return Response(report)
+
+    @extend_schema(responses={200: RoleChangeResponseSerializer})
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="change-role",
+        permission_classes=[ChangeActionPermissions],
+    )
+    def change_role(self, request: Request):
+        """Move many users to one role (and its group) with set-based queries."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = change_roles(
+            serializer.validated_data["users"], serializer.validated_data["role"]
+        )
+        return Response({"updated": updated})
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.is_active:
@@ -125,6 +173,10 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):  # type: ignore
         if self.action == "check_email":
             return EmailCheckRequestSerializer
+        if self.action == "change_role":
+            return RoleChangeSerializer
+        if self.action == "bulk_onboard":
+            return OnboardingUserSerializer
         if self.action == "create" or self.action == "signup":
             return UserSignupSerializer
         if self.action == "set_password":
@@ -136,3 +188,11 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+
+class CustomTokenVerifyView(TokenVerifyView):
+    serializer_class = CustomTokenVerifySerializer